@@ -2,21 +2,28 @@ import os
 import sys
 import json
 import time
-import asyncio
 import requests
+import itertools
+import functools
 import concurrent.futures
 from datetime import datetime, timedelta, UTC
-from tabulate import tabulate
+from email.utils import parsedate_to_datetime
 from typing import List, Dict, Any, Optional, Union, Tuple
 from dotenv import load_dotenv
 import re
 import glob
 import csv
 import io
+import tempfile
+import threading
+import traceback
 
-from utils.auth import retrieve_access_token
+from utils.auth import TokenCache
 from utils.storage import upload_to_azure_storage
 from utils.rate_limiter import RateLimiter
+from utils.http import SESSION, ensure_pool_size, prewarm, poll_delays, parse_json, iter_json_array, is_read_timeout, download_to_file
+from utils.mask import invert_mask
+from utils.cache import cache_enabled, cache_key, fetch_cached, store_cached
 from utils.filename import parse_size, parse_prompt_variations, get_variation_filename, get_unique_filename, replace_filename_tokens
 from services.image import generate_image, parse_model_variations, parse_style_ref_variations, generate_similar_image, expand_image, fill_image, create_mask
 from services.speech import generate_speech, get_available_voices, get_available_avatars, parse_voice_variations, get_voice_id_by_name, generate_avatar, get_avatar_id_by_name
@@ -39,6 +46,37 @@ from config.settings import (
 # Load environment variables
 load_dotenv()
 
+# Settings read once at import; commands and polling loops use these
+# instead of re-parsing the environment on every call
+CLIENT_ID = os.environ.get('FIREFLY_SERVICES_CLIENT_ID')
+THROTTLE_LIMIT = int(os.getenv('THROTTLE_LIMIT_FIREFLY', 5))
+THROTTLE_PERIOD = int(os.getenv('THROTTLE_PERIOD_SECONDS', 60))
+THROTTLE_MIN_DELAY = float(os.getenv('THROTTLE_MIN_DELAY_SECONDS', 0.0))
+
+@functools.lru_cache(maxsize=4)
+def _base_api_headers(access_token):
+    if not CLIENT_ID:
+        print("Error: FIREFLY_SERVICES_CLIENT_ID is not set in environment.")
+        sys.exit(1)
+    return (('x-api-key', CLIENT_ID), ('Authorization', f'Bearer {access_token}'))
+
+def api_headers(access_token, extra=None):
+    """
+    Build the headers for an authenticated Firefly API request. The client ID
+    lookup and header formatting are cached per access token.
+    
+    Args:
+        access_token (str): The authentication token
+        extra (dict): Additional headers to include
+    
+    Returns:
+        dict: A new headers dict that the caller may modify
+    """
+    headers = dict(_base_api_headers(access_token))
+    if extra:
+        headers.update(extra)
+    return headers
+
 def log_image_generation(prompt, model, output_filename, elapsed_time, success, error_msg=None, **kwargs):
     """
     Log image generation details to logs/image.txt
@@ -123,9 +161,18 @@ def log_image_generation(prompt, model, output_filename, elapsed_time, success,
     except Exception as e:
         # Don't let logging errors break the main functionality
         print(f"Warning: Could not write to log file: {e}")
-        import traceback
         traceback.print_exc()
 
+# API host each command talks to first, warmed up while the token is fetched
+COMMAND_HOSTS = {
+    **dict.fromkeys(['image', 'img', 'similar-image', 'sim', 'expand', 'fill', 'models', 'cm-list', 'ml', 'video'],
+                    'https://firefly-api.adobe.io'),
+    **dict.fromkeys(['mask', 'replace-bg'], 'https://image.adobe.io'),
+    **dict.fromkeys(['tts', 'speech', 'avatar', 'dub', 'voices', 'v', 'avatar-list', 'al', 'transcribe', 'trans'],
+                    'https://audio-video-api.adobe.io'),
+    **dict.fromkeys(['pdf', 'pdfupload'], 'https://pdf-services-ue1.adobe.io'),
+}
+
 def handle_command(args):
     """
     Handle the command based on the parsed arguments.
@@ -133,12 +180,25 @@ def handle_command(args):
     Args:
         args: Parsed command line arguments
     """
-    # Get access token
-    access_token = retrieve_access_token()
+    # An explicit --concurrency can need more pooled connections than the
+    # session was sized for; grow the pool before the first connection opens
+    if getattr(args, 'concurrency', None):
+        # Each submit worker has up to four poll workers on the same host
+        ensure_pool_size(args.concurrency * 5)
+
+    # Connect to the command's API host in the background while the token
+    # request is in flight
+    if args.command in COMMAND_HOSTS:
+        prewarm(COMMAND_HOSTS[args.command])
+    
+    # Get access token. The cache knows when it expires, so batch commands
+    # that take it can refresh it mid-run
+    token_cache = TokenCache(debug=getattr(args, 'debug', False))
+    access_token = token_cache.get_token()
     
     # Handle different commands
     if args.command in ['image', 'img']:
-        handle_image_command(args, access_token)
+        handle_image_command(args, access_token, token_cache)
     elif args.command in ['similar-image', 'sim']:
         handle_similar_image_command(args, access_token)
     elif args.command in ['tts', 'speech']:
@@ -160,7 +220,7 @@ def handle_command(args):
     elif args.command == 'mask':
         handle_mask_command(args, access_token)
     elif args.command == 'replace-bg':
-        handle_replace_bg_command(args, access_token)
+        handle_replace_bg_command(args, access_token, token_cache)
     elif args.command in ['models', 'cm-list', 'ml']:
         handle_list_custom_models_command(args, access_token)
     elif args.command == 'video':
@@ -173,15 +233,17 @@ def handle_command(args):
         print(f"Unknown command: {args.command}")
         sys.exit(1)
 
-def handle_image_command(args, access_token):
+def handle_image_command(args, access_token, token_cache=None):
     """Handle the image generation command with rate limiting and parallelism, supporting custom models by displayName or assetId, and CSV-driven batch input."""
-    import requests
-    import os
-    import sys
-    import time
+    # Batches can outlive the access token, so tasks take it from a cache that
+    # refreshes it before expiry or after a 401
+    if token_cache is None:
+        token_cache = TokenCache(access_token, debug=args.debug)
     import csv as csvmod
     # Standard models
     STANDARD_MODELS = {'image3', 'image4', 'image4_standard', 'image4_ultra', 'ultra'}
+    # Submission workers; the rate limiter still caps calls per period
+    concurrency = args.concurrency or THROTTLE_LIMIT
     # Helper for single job
     def run_image_job(prompt, model, output, style_ref, composition_ref, j, size, custom_model_asset_ids, rate_limiter=None):
         start_time = time.time()
@@ -215,42 +277,33 @@ def handle_image_command(args, access_token):
                 composition_ref_strength=args.composition_reference_strength,
                 custom_model=is_custom
             )
-            if args.debug:
-                print(f"Job ID: {job_info['jobId']}")
-                print("Polling for job completion...")
-            result = check_job_status(job_info['statusUrl'], access_token, args.silent, args.debug, rate_limiter)
-            if 'result' in result and 'outputs' in result['result']:
-                outputs = result['result']['outputs']
-                if outputs:
-                    image_url = outputs[0]['image']['url']
-                    if args.debug:
-                        print(f"Downloading image to {output_filename}...")
-                    download_file(image_url, output_filename, args.silent, args.debug)
-                    elapsed_time = time.time() - start_time
-                    print(f"✓ Generated: {os.path.basename(output_filename)} ({elapsed_time:.1f}s)")
-                    # Log successful generation
-                    log_image_generation(
-                        prompt=prompt,
-                        model=model,
-                        output_filename=os.path.basename(output_filename),
-                        elapsed_time=elapsed_time,
-                        success=True,
-                        content_class=args.content_class,
-                        negative_prompt=args.negative_prompt,
-                        locale=args.locale,
-                        size=size,
-                        seeds=args.seeds,
-                        visual_intensity=args.visual_intensity,
-                        style_ref=style_ref,
-                        style_ref_strength=args.style_reference_strength,
-                        composition_ref=composition_ref,
-                        composition_ref_strength=args.composition_reference_strength,
-                        num_variations=1,
-                        debug=args.debug,
-                        silent=args.silent,
-                        overwrite=args.overwrite
-                    )
-                    return True
+            if run_job(job_info, access_token, [output_filename],
+                       silent=args.silent, debug=args.debug, rate_limiter=rate_limiter):
+                elapsed_time = time.time() - start_time
+                print(f"✓ Generated: {os.path.basename(output_filename)} ({elapsed_time:.1f}s)")
+                # Log successful generation
+                log_image_generation(
+                    prompt=prompt,
+                    model=model,
+                    output_filename=os.path.basename(output_filename),
+                    elapsed_time=elapsed_time,
+                    success=True,
+                    content_class=args.content_class,
+                    negative_prompt=args.negative_prompt,
+                    locale=args.locale,
+                    size=size,
+                    seeds=args.seeds,
+                    visual_intensity=args.visual_intensity,
+                    style_ref=style_ref,
+                    style_ref_strength=args.style_reference_strength,
+                    composition_ref=composition_ref,
+                    composition_ref_strength=args.composition_reference_strength,
+                    num_variations=1,
+                    debug=args.debug,
+                    silent=args.silent,
+                    overwrite=args.overwrite
+                )
+                return True
             elapsed_time = time.time() - start_time
             print(f"✗ Failed: {os.path.basename(output_filename)} ({elapsed_time:.1f}s)")
             # Log failed generation
@@ -305,7 +358,6 @@ def handle_image_command(args, access_token):
                 overwrite=args.overwrite
             )
             if args.debug:
-                import traceback
                 traceback.print_exc()
             # Check if it's a 529 error (overloaded service)
             if "529" in str(e) or "Too Many Requests" in str(e):
@@ -317,9 +369,9 @@ def handle_image_command(args, access_token):
         csv_path = args.csv_input
         subject_val = getattr(args, 'subject', None)
         cli_model = getattr(args, 'model', None)
-        throttle_limit = int(os.getenv('THROTTLE_LIMIT_FIREFLY', 5))
-        throttle_period = int(os.getenv('THROTTLE_PERIOD_SECONDS', 60))
-        throttle_min_delay = float(os.getenv('THROTTLE_MIN_DELAY_SECONDS', 0.0))
+        throttle_limit = THROTTLE_LIMIT
+        throttle_period = THROTTLE_PERIOD
+        throttle_min_delay = THROTTLE_MIN_DELAY
         rate_limiter = RateLimiter(throttle_limit, throttle_period, throttle_min_delay)
         with open(csv_path, newline='', encoding='utf-8-sig') as csvfile:
             reader = csvmod.DictReader(csvfile)
@@ -347,18 +399,10 @@ def handle_image_command(args, access_token):
                     resolved_model_versions.append(model_stripped)
                 else:
                     # Query custom models API for CLI model
-                    api_key = os.environ.get('FIREFLY_SERVICES_CLIENT_ID')
-                    if not api_key:
-                        print("Error: FIREFLY_SERVICES_CLIENT_ID is not set in environment.")
-                        sys.exit(1)
-                    headers = {
-                        'x-api-key': api_key,
-                        'x-request-id': f'ffcli-{int(time.time())}',
-                        'Authorization': f'Bearer {access_token}'
-                    }
+                    headers = api_headers(access_token, {'x-request-id': f'ffcli-{int(time.time())}'})
                     url = 'https://firefly-api.adobe.io/v3/custom-models'
                     try:
-                        response = requests.get(url, headers=headers)
+                        response = SESSION.get(url, headers=headers)
                         response.raise_for_status()
                         data = response.json()
                         models = data.get('custom_models', [])
@@ -384,18 +428,10 @@ def handle_image_command(args, access_token):
         for model in all_models:
             if model and model not in STANDARD_MODELS and model != '{Model}':
                 # Query custom models API
-                api_key = os.environ.get('FIREFLY_SERVICES_CLIENT_ID')
-                if not api_key:
-                    print("Error: FIREFLY_SERVICES_CLIENT_ID is not set in environment.")
-                    sys.exit(1)
-                headers = {
-                    'x-api-key': api_key,
-                    'x-request-id': f'ffcli-{int(time.time())}',
-                    'Authorization': f'Bearer {access_token}'
-                }
+                headers = api_headers(access_token, {'x-request-id': f'ffcli-{int(time.time())}'})
                 url = 'https://firefly-api.adobe.io/v3/custom-models'
                 try:
-                    response = requests.get(url, headers=headers)
+                    response = SESSION.get(url, headers=headers)
                     response.raise_for_status()
                     data = response.json()
                     models = data.get('custom_models', [])
@@ -419,9 +455,8 @@ def handle_image_command(args, access_token):
         # Process each row
         all_tasks = []
         failed_tasks = []  # Track failed tasks for retry
-        current_generation = 0
         throttle_pause = float(os.getenv('THROTTLE_PAUSE_SECONDS', 0.5))
-        with concurrent.futures.ThreadPoolExecutor(max_workers=throttle_limit) as executor:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
             for row in rows:
                 prompt = row.get('Prompt', '').strip()
                 model = row.get('Model', '').strip() if 'Model' in row else None
@@ -451,28 +486,24 @@ def handle_image_command(args, access_token):
                             model = model_asset_id
                         # If not found, assume it's already an assetId
                 
-                # Parse model variations (should be rare in CSV, but support)
-                model_variations = [model]  # Use the resolved model directly
-                for model_version in model_variations:
-                    # Parse prompt variations (bracketed)
-                    prompts, _ = parse_prompt_variations(prompt)
-                    for prompt_var in prompts:
-                        # Use output as template (inject subject, etc.)
-                        out_path = output
-                        # Throttle
-                        rate_limiter.acquire()
-                        task_info = {
-                            'prompt': prompt_var,
-                            'model': model_version,
-                            'output': out_path,
-                            'style_ref': None,
-                            'composition_ref': None,
-                            'j': 0,
-                            'size': None,
-                            'custom_model_asset_ids': custom_model_asset_ids
-                        }
-                        task = executor.submit(run_image_job, prompt_var, model_version, out_path, None, None, 0, None, custom_model_asset_ids, rate_limiter)
-                        all_tasks.append((task, task_info))
+                # Each row uses its one resolved model; bracketed prompt
+                # variations become separate tasks
+                prompts, _ = parse_prompt_variations(prompt)
+                for prompt_var in prompts:
+                    # Throttle
+                    rate_limiter.acquire()
+                    task_info = {
+                        'prompt': prompt_var,
+                        'model': model,
+                        'output': output,
+                        'style_ref': None,
+                        'composition_ref': None,
+                        'j': 0,
+                        'size': None,
+                        'custom_model_asset_ids': custom_model_asset_ids
+                    }
+                    task = executor.submit(run_image_job, prompt_var, model, output, None, None, 0, None, custom_model_asset_ids, rate_limiter)
+                    all_tasks.append((task, task_info))
                 
                 # Add delay between rows
                 if throttle_pause > 0:
@@ -497,7 +528,7 @@ def handle_image_command(args, access_token):
         if failed_tasks:
             print(f"\nRetrying {len(failed_tasks)} failed tasks...")
             retry_tasks = []
-            with concurrent.futures.ThreadPoolExecutor(max_workers=throttle_limit) as executor:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
                 for task_info in failed_tasks:
                     retry_task = executor.submit(
                         run_image_job, 
@@ -534,18 +565,10 @@ def handle_image_command(args, access_token):
             resolved_model_versions.append(model_stripped)
         else:
             # Query custom models API
-            api_key = os.environ.get('FIREFLY_SERVICES_CLIENT_ID')
-            if not api_key:
-                print("Error: FIREFLY_SERVICES_CLIENT_ID is not set in environment.")
-                sys.exit(1)
-            headers = {
-                'x-api-key': api_key,
-                'x-request-id': f'ffcli-{int(time.time())}',
-                'Authorization': f'Bearer {access_token}'
-            }
+            headers = api_headers(access_token, {'x-request-id': f'ffcli-{int(time.time())}'})
             url = 'https://firefly-api.adobe.io/v3/custom-models'
             try:
-                response = requests.get(url, headers=headers)
+                response = SESSION.get(url, headers=headers)
                 response.raise_for_status()
                 data = response.json()
                 
@@ -589,19 +612,25 @@ def handle_image_command(args, access_token):
             sys.exit(1)
     # Parse prompt variations
     prompts, variation_blocks = parse_prompt_variations(args.prompt)
-    total_variations = len(prompts)
     # Parse style reference variations
     style_refs = parse_style_ref_variations(args.style_reference) if args.style_reference else [None]
-    total_style_refs = len(style_refs)
     # Parse composition reference variations
     composition_refs = parse_style_ref_variations(args.composition_reference) if args.composition_reference else [None]
+    if args.unique_prompts:
+        # Each duplicate would be a separate, separately billed generation;
+        # dict.fromkeys drops them while keeping first-seen order
+        prompts = tuple(dict.fromkeys(prompts))
+        style_refs = tuple(dict.fromkeys(style_refs))
+        composition_refs = tuple(dict.fromkeys(composition_refs))
+    total_variations = len(prompts)
+    total_style_refs = len(style_refs)
     total_composition_refs = len(composition_refs)
     # Calculate total number of generations
     total_generations = total_variations * total_models * total_style_refs * total_composition_refs * args.numVariations
     # Get throttle limit from environment
-    throttle_limit = int(os.getenv('THROTTLE_LIMIT_FIREFLY', 5))
-    throttle_period = int(os.getenv('THROTTLE_PERIOD_SECONDS', 60))
-    throttle_min_delay = float(os.getenv('THROTTLE_MIN_DELAY_SECONDS', 0.0))
+    throttle_limit = THROTTLE_LIMIT
+    throttle_period = THROTTLE_PERIOD
+    throttle_min_delay = THROTTLE_MIN_DELAY
     rate_limiter = RateLimiter(throttle_limit, throttle_period, throttle_min_delay)
     if not args.silent:
         print(f'Generating {total_generations} total variations:')
@@ -611,131 +640,167 @@ def handle_image_command(args, access_token):
         print(f'  • {total_composition_refs} composition references')
         print(f'  • {args.numVariations} variations per combination')
         print(f'Using parallel processing with rate limit of {throttle_limit} calls per minute\n')
-    def image_task(prompt, model_version, style_ref, composition_ref, j):
+    # Set once a task hits an error that dooms the rest of the batch
+    stop_batch = threading.Event()
+    # generate_image options shared by every task in the batch
+    generate_options = {
+        'content_class': args.content_class,
+        'negative_prompt': args.negative_prompt,
+        'prompt_biasing_locale': args.locale,
+        'size': size,
+        'seeds': args.seeds,
+        'debug': args.debug,
+        'visual_intensity': args.visual_intensity,
+        'style_ref_strength': args.style_reference_strength,
+        'composition_ref_strength': args.composition_reference_strength
+    }
+    def image_task(prompt, model_version, style_ref, composition_ref, iterations):
         start_time = time.time()
         rate_limiter.acquire()
-        tokens = {
-            'prompt': prompt,
-            'model': model_version,
-            'size': size,
-            'seeds': args.seeds,
-            'style_ref': style_ref,
-            'composition_ref': composition_ref,
-            'iteration': j + 1
-        }
-        base_filename = get_variation_filename(args.output, prompt, args.prompt, tokens, args.debug)
-        output_filename = get_unique_filename(base_filename, args.overwrite, args.debug)
+        if stop_batch.is_set():
+            # Tasks already waiting on the rate limiter when the batch was
+            # stopped must not make another request
+            return False
+        output_filenames = []
+        for j in iterations:
+            tokens = {
+                'prompt': prompt,
+                'model': model_version,
+                'size': size,
+                'seeds': args.seeds,
+                'style_ref': style_ref,
+                'composition_ref': composition_ref,
+                'iteration': j + 1
+            }
+            base_filename = get_variation_filename(args.output, prompt, args.prompt, tokens, args.debug)
+            # Nothing is on disk until the job finishes, so names already
+            # picked for this job have to be ruled out explicitly
+            output_filenames.append(get_unique_filename(base_filename, args.overwrite, args.debug,
+                                                        reserved=output_filenames))
         try:
             # If this is a custom model, pass assetId as x-model-version header
             is_custom = model_version in custom_model_asset_ids
-            job_info = generate_image(
-                access_token=access_token,
+            job_info = token_cache.call(lambda token: generate_image(
+                access_token=token,
                 prompt=prompt,
-                num_generations=1,
+                num_generations=len(iterations),
                 model_version=model_version,
-                content_class=args.content_class,
-                negative_prompt=args.negative_prompt,
-                prompt_biasing_locale=args.locale,
-                size=size,
-                seeds=args.seeds,
-                debug=args.debug,
-                visual_intensity=args.visual_intensity,
                 style_ref_path=style_ref,
-                style_ref_strength=args.style_reference_strength,
                 composition_ref_path=composition_ref,
-                composition_ref_strength=args.composition_reference_strength,
-                custom_model=is_custom
-            )
-            if args.debug:
-                print(f"Job ID: {job_info['jobId']}")
-                print("Polling for job completion...")
-            result = check_job_status(job_info['statusUrl'], access_token, args.silent, args.debug, rate_limiter)
-            if 'result' in result and 'outputs' in result['result']:
-                outputs = result['result']['outputs']
-                if outputs:
-                    image_url = outputs[0]['image']['url']
-                    if args.debug:
-                        print(f"Downloading image to {output_filename}...")
-                    download_file(image_url, output_filename, args.silent, args.debug)
-                    elapsed_time = time.time() - start_time
-                    print(f"✓ Generated: {os.path.basename(output_filename)} ({elapsed_time:.1f}s)")
-                    # Log successful generation
-                    log_image_generation(
-                        prompt=prompt,
-                        model=model_version,
-                        output_filename=os.path.basename(output_filename),
-                        elapsed_time=elapsed_time,
-                        success=True,
-                        content_class=args.content_class,
-                        negative_prompt=args.negative_prompt,
-                        locale=args.locale,
-                        size=size,
-                        seeds=args.seeds,
-                        visual_intensity=args.visual_intensity,
-                        style_ref=style_ref,
-                        style_ref_strength=args.style_reference_strength,
-                        composition_ref=composition_ref,
-                        composition_ref_strength=args.composition_reference_strength,
-                        num_variations=1,
-                        debug=args.debug,
-                        silent=args.silent,
-                        overwrite=args.overwrite
-                    )
-                    return True
+                custom_model=is_custom,
+                **generate_options
+            ))
+            # Hand the job to the poll stage so this worker can submit the
+            # next one while the job runs
+            return poll_pool.submit(finish_image_task, job_info, prompt, model_version, style_ref, composition_ref, output_filenames, start_time)
+        except Exception as e:
             elapsed_time = time.time() - start_time
-            print(f"✗ Failed: {os.path.basename(output_filename)} ({elapsed_time:.1f}s)")
-            # Log failed generation
-            log_image_generation(
-                prompt=prompt,
-                model=model_version,
-                output_filename=os.path.basename(output_filename),
-                elapsed_time=elapsed_time,
-                success=False,
-                error_msg="No outputs in response",
-                content_class=args.content_class,
-                negative_prompt=args.negative_prompt,
-                locale=args.locale,
-                size=size,
-                seeds=args.seeds,
-                visual_intensity=args.visual_intensity,
-                style_ref=style_ref,
-                style_ref_strength=args.style_reference_strength,
-                composition_ref=composition_ref,
-                composition_ref_strength=args.composition_reference_strength,
-                num_variations=1,
-                debug=args.debug,
-                silent=args.silent,
-                overwrite=args.overwrite
-            )
+            print(f"Error generating image: {str(e)} ({elapsed_time:.1f}s)")
+            if args.debug:
+                traceback.print_exc()
+            if is_auth_error(e):
+                # Every remaining task would fail the same way; let the main
+                # loop see this and stop the batch
+                raise
             return False
+
+    def log_image_result(prompt, model_version, style_ref, composition_ref, output_filename, elapsed_time, success, error_msg=None):
+        log_image_generation(
+            prompt=prompt,
+            model=model_version,
+            output_filename=os.path.basename(output_filename),
+            elapsed_time=elapsed_time,
+            success=success,
+            error_msg=error_msg,
+            content_class=args.content_class,
+            negative_prompt=args.negative_prompt,
+            locale=args.locale,
+            size=size,
+            seeds=args.seeds,
+            visual_intensity=args.visual_intensity,
+            style_ref=style_ref,
+            style_ref_strength=args.style_reference_strength,
+            composition_ref=composition_ref,
+            composition_ref_strength=args.composition_reference_strength,
+            num_variations=1,
+            debug=args.debug,
+            silent=args.silent,
+            overwrite=args.overwrite
+        )
+
+    def finish_image_task(job_info, prompt, model_version, style_ref, composition_ref, output_filenames, start_time):
+        try:
+            downloaded = set(token_cache.call(lambda token: run_job(job_info, token, output_filenames,
+                                                                    silent=args.silent, debug=args.debug, rate_limiter=rate_limiter)))
+            elapsed_time = time.time() - start_time
+            for output_filename in output_filenames:
+                if output_filename in downloaded:
+                    print(f"✓ Generated: {os.path.basename(output_filename)} ({elapsed_time:.1f}s)")
+                    log_image_result(prompt, model_version, style_ref, composition_ref, output_filename, elapsed_time, True)
+                else:
+                    print(f"✗ Failed: {os.path.basename(output_filename)} ({elapsed_time:.1f}s)")
+                    log_image_result(prompt, model_version, style_ref, composition_ref, output_filename, elapsed_time, False,
+                                     error_msg="No outputs in response")
+            return len(downloaded) == len(output_filenames)
         except Exception as e:
             elapsed_time = time.time() - start_time
             print(f"Error generating image: {str(e)} ({elapsed_time:.1f}s)")
             if args.debug:
-                import traceback
                 traceback.print_exc()
+            if is_auth_error(e):
+                raise
             return False
-    # Create a list to store all generation tasks
-    generation_tasks = []
-    current_generation = 0
-    # Prepare the table header
+    # Variations of one combination are requested as a single multi-output
+    # job. A --seeds list is sent with every job as-is, so with seeds each
+    # variation keeps its own single-output job as before
+    if args.no_batch or args.seeds:
+        variation_groups = [(j,) for j in range(args.numVariations)]
+    else:
+        variation_groups = [tuple(range(args.numVariations))]
+    # Every (model, style ref, composition ref, prompt, variation) combination
+    combos = list(itertools.product(resolved_model_versions, style_refs, composition_refs, prompts, range(args.numVariations)))
+    # Print the task table in one write
     if not args.silent:
-        print("Generation Tasks:")
-        print(f"{'#':<4} {'Model':<15} {'Prompt':<40} {'SRef':<20} {'SRef-Strength':<15} {'CRef':<20} {'CRef-Strength':<15}")
-        print("-" * 120)
-    tasks = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=throttle_limit) as executor:
-        for model_version in resolved_model_versions:
-            for style_ref in style_refs:
-                for composition_ref in composition_refs:
-                    for i, prompt in enumerate(prompts, 1):
-                        for j in range(args.numVariations):
-                            current_generation += 1
-                            if not args.silent:
-                                print(f"{current_generation:<4} {model_version:<15} {prompt[:40]:<40} {os.path.basename(style_ref) if style_ref else 'None':<20} {args.style_reference_strength:<15} {os.path.basename(composition_ref) if composition_ref else 'None':<20} {args.composition_reference_strength:<15}")
-                            tasks.append(executor.submit(image_task, prompt, model_version, style_ref, composition_ref, j))
-        for future in concurrent.futures.as_completed(tasks):
-            future.result()
+        rows = [
+            "Generation Tasks:",
+            f"{'#':<4} {'Model':<15} {'Prompt':<40} {'SRef':<20} {'SRef-Strength':<15} {'CRef':<20} {'CRef-Strength':<15}",
+            "-" * 120
+        ]
+        # A handful of reference files repeat across every row, so name each once
+        ref_names = {ref: os.path.basename(ref) if ref else 'None' for ref in (*style_refs, *composition_refs)}
+        rows.extend(
+            f"{n:<4} {model_version:<15} {prompt[:40]:<40} {ref_names[style_ref]:<20} {args.style_reference_strength:<15} {ref_names[composition_ref]:<20} {args.composition_reference_strength:<15}"
+            for n, (model_version, style_ref, composition_ref, prompt, _) in enumerate(combos, 1)
+        )
+        sys.stdout.write("\n".join(rows) + "\n")
+    # Two stages: submit workers start jobs at the rate limit while poll
+    # workers wait for earlier jobs and download their results
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency * 4) as poll_pool, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = {
+            executor.submit(image_task, prompt, model_version, style_ref, composition_ref, iterations)
+            for model_version, style_ref, composition_ref, prompt, iterations
+            in itertools.product(resolved_model_versions, style_refs, composition_refs, prompts, variation_groups)
+        }
+        # Submit tasks hand back a poll-stage future, which joins the pending
+        # set; the first task that raises stops the whole batch
+        fatal_error = None
+        while pending and fatal_error is None:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    fatal_error = future.exception()
+                elif isinstance(future.result(), concurrent.futures.Future):
+                    pending.add(future.result())
+        if fatal_error is not None:
+            stop_batch.set()
+            # Queued tasks never start; the executors still wait for the ones
+            # already running
+            cancelled = sum(future.cancel() for future in pending)
+            print(f"\nStopping: {str(fatal_error)}")
+            print(f"Cancelled {cancelled} remaining tasks.")
+    if fatal_error is not None:
+        sys.exit(1)
     if not args.silent:
         print("\nAll image generation tasks completed.")
 
@@ -763,9 +828,9 @@ def handle_similar_image_command(args, access_token):
     total_generations = total_models * args.numVariations
 
     # Get throttle limit from environment
-    throttle_limit = int(os.getenv('THROTTLE_LIMIT_FIREFLY', 5))
-    throttle_period = int(os.getenv('THROTTLE_PERIOD_SECONDS', 60))
-    throttle_min_delay = float(os.getenv('THROTTLE_MIN_DELAY_SECONDS', 0.0))
+    throttle_limit = THROTTLE_LIMIT
+    throttle_period = THROTTLE_PERIOD
+    throttle_min_delay = THROTTLE_MIN_DELAY
     rate_limiter = RateLimiter(throttle_limit, throttle_period, throttle_min_delay)
 
     if not args.silent:
@@ -776,15 +841,19 @@ def handle_similar_image_command(args, access_token):
 
     def similar_image_task(model_version, j):
         rate_limiter.acquire()
+        # One clock reading so the date/time tokens always agree
+        now = datetime.now()
+        date_s = now.strftime('%Y-%m-%d')
+        time_s = now.strftime('%H-%M-%S')
         tokens = {
             'model': model_version,
             'size': size,
             'seeds': args.seeds,
             'iteration': j + 1,
             'n': args.numVariations,
-            'date': datetime.now().strftime('%Y-%m-%d'),
-            'time': datetime.now().strftime('%H-%M-%S'),
-            'datetime': datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+            'date': date_s,
+            'time': time_s,
+            'datetime': f'{date_s}_{time_s}'
         }
         if size:
             tokens.update({
@@ -804,29 +873,27 @@ def handle_similar_image_command(args, access_token):
                 seeds=args.seeds,
                 debug=args.debug
             )
+            # Hand the job to the poll stage so this worker can submit the
+            # next one while the job runs
+            return poll_pool.submit(finish_similar_image_task, job_info, output_filename)
+        except Exception as e:
+            print(f"Error generating similar image: {str(e)}")
             if args.debug:
-                print(f"Job ID: {job_info['jobId']}")
-                print("Polling for job completion...")
-            result = check_job_status(job_info['statusUrl'], access_token, args.silent, args.debug, rate_limiter)
-            if 'result' in result and 'outputs' in result['result']:
-                outputs = result['result']['outputs']
-                if outputs:
-                    image_url = outputs[0]['image']['url']
-                    if args.debug:
-                        print(f"Downloading image to {output_filename}...")
-                    download_file(image_url, output_filename, args.silent, args.debug)
-                    return True
+                traceback.print_exc()
             return False
+
+    def finish_similar_image_task(job_info, output_filename):
+        try:
+            return bool(run_job(job_info, access_token, [output_filename],
+                                silent=args.silent, debug=args.debug, rate_limiter=rate_limiter))
         except Exception as e:
             print(f"Error generating similar image: {str(e)}")
             if args.debug:
-                import traceback
                 traceback.print_exc()
             return False
 
     # Create a list to store all generation tasks
     tasks = []
-    current_generation = 0
 
     # Prepare the table header
     if not args.silent:
@@ -834,15 +901,21 @@ def handle_similar_image_command(args, access_token):
         print(f"{'#':<4} {'Model':<15}")
         print("-" * 20)
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=throttle_limit) as executor:
-        for model_version in model_versions:
-            for j in range(args.numVariations):
-                current_generation += 1
-                if not args.silent:
-                    print(f"{current_generation:<4} {model_version:<15}")
-                tasks.append(executor.submit(similar_image_task, model_version, j))
-        for future in concurrent.futures.as_completed(tasks):
-            future.result()
+    # Two stages, as for image: submit workers start jobs at the rate limit
+    # while poll workers wait for earlier jobs and download their results
+    with concurrent.futures.ThreadPoolExecutor(max_workers=throttle_limit * 4) as poll_pool, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=throttle_limit) as executor:
+        for current_generation, (model_version, j) in enumerate(itertools.product(model_versions, range(args.numVariations)), 1):
+            if not args.silent:
+                print(f"{current_generation:<4} {model_version:<15}")
+            tasks.append(executor.submit(similar_image_task, model_version, j))
+        # Submit tasks hand back a poll-stage future to wait on as well
+        pending = set(tasks)
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if isinstance(future.result(), concurrent.futures.Future):
+                    pending.add(future.result())
     if not args.silent:
         print("\nAll similar image generation tasks completed.")
 
@@ -883,9 +956,9 @@ def handle_tts_command(args, access_token):
         return
 
     # Create rate limiter for API calls using environment variable
-    throttle_limit = int(os.getenv('THROTTLE_LIMIT_FIREFLY', 5))
-    throttle_period = int(os.getenv('THROTTLE_PERIOD_SECONDS', 60))
-    throttle_min_delay = float(os.getenv('THROTTLE_MIN_DELAY_SECONDS', 0.0))
+    throttle_limit = THROTTLE_LIMIT
+    throttle_period = THROTTLE_PERIOD
+    throttle_min_delay = THROTTLE_MIN_DELAY
     rate_limiter = RateLimiter(throttle_limit, throttle_period, throttle_min_delay)
 
     # Prepare voice combinations
@@ -1021,113 +1094,101 @@ def handle_tts_command(args, access_token):
             print("Error: Input text must be at least 15 characters long")
             return
 
-    # Create tasks for parallel processing
-    tasks = []
-    for combo in voice_combinations:
-        for i, (paragraph, info) in enumerate(zip(paragraphs, paragraph_info), 1):
-            def tts_task(voice_combo, para, info):
-                try:
-                    # Generate speech
-                    if args.debug:
-                        print(f"\nGenerating speech with voice: {voice_combo['id']} ({voice_combo['name']} - {voice_combo['style']})")
-                        print(f"Processing paragraph {info['para_num']} of {info['total_paras']}")
-                        if info['is_split']:
-                            print(f"Segment {info['sentence_num']} of {info['total_sentences']} sentences")
-                    
-                    # Create tokens for filename
-                    tokens = {
-                        'date': datetime.now().strftime('%Y-%m-%d'),
-                        'time': datetime.now().strftime('%H-%M-%S'),
-                        'datetime': datetime.now().strftime('%Y-%m-%d_%H-%M-%S'),
-                        'voice_id': voice_combo['id'],
-                        'voice_name': voice_combo['name'],
-                        'voice_style': voice_combo['style'] or '',
-                        'locale_code': args.locale,
-                        'para_num': f"{info['para_num']:02d}",
-                        'total_paras': f"{info['total_paras']:02d}",
-                        'sentence_num': f"{info['sentence_num']:02d}",
-                        'total_sentences': f"{info['total_sentences']:02d}",
-                        'char_count': f"{info['char_count']:02d}"
-                    }
-                    
-                    # Add paragraph number to output path if splitting paragraphs
-                    if args.p_split:
-                        output_path = args.output.format(**tokens)
-                    else:
-                        output_path = args.output.format(**tokens)
-                    
-                    if args.debug:
-                        print(f"Original output path: {args.output}")
-                        print(f"Tokens: {tokens}")
-                        print(f"Replaced output path: {output_path}")
-                    
-                    # Create output directory if it doesn't exist
-                    output_dir = os.path.dirname(output_path)
-                    if output_dir:
-                        os.makedirs(output_dir, exist_ok=True)
+    def tts_task(voice_combo, para, info):
+        try:
+            # Generate speech
+            if args.debug:
+                print(f"\nGenerating speech with voice: {voice_combo['id']} ({voice_combo['name']} - {voice_combo['style']})")
+                print(f"Processing paragraph {info['para_num']} of {info['total_paras']}")
+                if info['is_split']:
+                    print(f"Segment {info['sentence_num']} of {info['total_sentences']} sentences")
+
+            # One clock reading so the date/time tokens always agree
+            now = datetime.now()
+            date_s = now.strftime('%Y-%m-%d')
+            time_s = now.strftime('%H-%M-%S')
+            # Create tokens for filename
+            tokens = {
+                'date': date_s,
+                'time': time_s,
+                'datetime': f'{date_s}_{time_s}',
+                'voice_id': voice_combo['id'],
+                'voice_name': voice_combo['name'],
+                'voice_style': voice_combo['style'] or '',
+                'locale_code': args.locale,
+                'para_num': f"{info['para_num']:02d}",
+                'total_paras': f"{info['total_paras']:02d}",
+                'sentence_num': f"{info['sentence_num']:02d}",
+                'total_sentences': f"{info['total_sentences']:02d}",
+                'char_count': f"{info['char_count']:02d}"
+            }
+
+            output_path = args.output.format(**tokens)
+
+            if args.debug:
+                print(f"Original output path: {args.output}")
+                print(f"Tokens: {tokens}")
+                print(f"Replaced output path: {output_path}")
+
+            # Create output directory if it doesn't exist
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+                if args.debug:
+                    print(f"Created output directory: {output_dir}")
+
+            # Generate speech
+            response = generate_speech(
+                access_token=access_token,
+                text=para,
+                voice_id=voice_combo['id'],
+                locale_code=args.locale,
+                debug=args.debug
+            )
+
+            if response and 'jobId' in response and 'statusUrl' in response:
+                if args.debug:
+                    print(f"Job ID: {response['jobId']}")
+                    print("Polling for job completion...")
+
+                # Poll the status URL until the job is complete
+                result = check_job_status(response['statusUrl'], access_token, args.silent, args.debug, rate_limiter)
+
+                if result.get('status') == 'succeeded' and 'output' in result:
+                    # Download the audio file
+                    audio_url = result['output']['url']
+
+                    # Download the file
+                    try:
                         if args.debug:
-                            print(f"Created output directory: {output_dir}")
-                    
-                    # Generate speech
-                    response = generate_speech(
-                        access_token=access_token,
-                        text=para,
-                        voice_id=voice_combo['id'],
-                        locale_code=args.locale,
-                        debug=args.debug
-                    )
-                    
-                    if response and 'jobId' in response and 'statusUrl' in response:
+                            print(f"Making request to download file from {audio_url}")
+                        download_to_file(audio_url, output_path)
+
                         if args.debug:
-                            print(f"Job ID: {response['jobId']}")
-                            print("Polling for job completion...")
-                        
-                        # Poll the status URL until the job is complete
-                        result = check_job_status(response['statusUrl'], access_token, args.silent, args.debug, rate_limiter)
-                        
-                        if result.get('status') == 'succeeded' and 'output' in result:
-                            # Download the audio file
-                            audio_url = result['output']['url']
-                            
-                            # Download the file
-                            try:
-                                if args.debug:
-                                    print(f"Making request to download file from {audio_url}")
-                                response = requests.get(audio_url, stream=True)
-                                response.raise_for_status()
-                                
-                                if args.debug:
-                                    print(f"Response status: {response.status_code}")
-                                    print(f"Response headers: {response.headers}")
-                                
-                                with open(output_path, 'wb') as f:
-                                    for chunk in response.iter_content(chunk_size=8192):
-                                        if chunk:
-                                            f.write(chunk)
-                                
-                                if args.debug:
-                                    print(f"Successfully downloaded to {output_path}")
-                                    print(f"File size: {os.path.getsize(output_path)} bytes")
-                                return True
-                            except Exception as e:
-                                print(f"Error downloading file for {voice_combo['name']}: {str(e)}")
-                                if args.debug:
-                                    import traceback
-                                    traceback.print_exc()
-                                return False
-                        else:
-                            if args.debug:
-                                print("No output URL found in result")
-                                print(f"Result: {result}")
-                    return False
-                except Exception as e:
-                    print(f"Error generating speech for {voice_combo['name']}: {str(e)}")
+                            print(f"Successfully downloaded to {output_path}")
+                            print(f"File size: {os.path.getsize(output_path)} bytes")
+                        return True
+                    except Exception as e:
+                        print(f"Error downloading file for {voice_combo['name']}: {str(e)}")
+                        if args.debug:
+                            traceback.print_exc()
+                        return False
+                else:
                     if args.debug:
-                        import traceback
-                        traceback.print_exc()
-                    return False
+                        print("No output URL found in result")
+                        print(f"Result: {result}")
+            return False
+        except Exception as e:
+            print(f"Error generating speech for {voice_combo['name']}: {str(e)}")
+            if args.debug:
+                traceback.print_exc()
+            return False
 
-            tasks.append((tts_task, combo, paragraph, info))
+    # Create tasks for parallel processing: one per (voice, paragraph)
+    tasks = [
+        (tts_task, combo, para, info)
+        for combo, (para, info) in itertools.product(voice_combinations, zip(paragraphs, paragraph_info))
+    ]
 
     # Process tasks in parallel with rate limiting
     results = process_tasks_parallel(tasks, rate_limiter)
@@ -1174,9 +1235,9 @@ def handle_avatar_command(args, access_token):
         return
 
     # Create rate limiter for API calls using environment variable
-    throttle_limit = int(os.getenv('THROTTLE_LIMIT_FIREFLY', 5))
-    throttle_period = int(os.getenv('THROTTLE_PERIOD_SECONDS', 60))
-    throttle_min_delay = float(os.getenv('THROTTLE_MIN_DELAY_SECONDS', 0.0))
+    throttle_limit = THROTTLE_LIMIT
+    throttle_period = THROTTLE_PERIOD
+    throttle_min_delay = THROTTLE_MIN_DELAY
     rate_limiter = RateLimiter(throttle_limit, throttle_period, throttle_min_delay)
 
     # Prepare voice combinations
@@ -1344,137 +1405,127 @@ def handle_avatar_command(args, access_token):
             print("Error: Input text must be at least 15 characters long")
             return
 
-    # Create tasks for parallel processing
-    tasks = []
-    for voice_combo in voice_combinations:
-        for avatar_combo in avatar_combinations:
-            for i, (paragraph, info) in enumerate(zip(paragraphs, paragraph_info), 1):
-                def create_avatar_task(vc, ac, para, info):
-                    def avatar_task():
+    def avatar_task(vc, ac, para, info):
+        try:
+            # Generate avatar video
+            if args.debug:
+                print(f"\nGenerating avatar video with voice: {vc['id']} ({vc['name']} - {vc['style']})")
+                print(f"Avatar: {ac['id']} ({ac['name']})")
+                print(f"Processing paragraph {info['para_num']} of {info['total_paras']}")
+                if info['is_split']:
+                    print(f"Segment {info['sentence_num']} of {info['total_sentences']} sentences")
+
+            # One clock reading so the date/time tokens always agree
+            now = datetime.now()
+            date_s = now.strftime('%Y-%m-%d')
+            time_s = now.strftime('%H-%M-%S')
+            # Create tokens for filename
+            tokens = {
+                'date': date_s,
+                'time': time_s,
+                'datetime': f'{date_s}_{time_s}',
+                'voice_id': vc['id'],
+                'voice_name': vc['name'],
+                'voice_style': vc['style'] or '',
+                'avatar_id': ac['id'],
+                'avatar_name': ac['name'],
+                'locale_code': args.locale,
+                'para_num': f"{info['para_num']:02d}",
+                'total_paras': f"{info['total_paras']:02d}",
+                'sentence_num': f"{info['sentence_num']:02d}",
+                'total_sentences': f"{info['total_sentences']:02d}",
+                'char_count': f"{info['char_count']:02d}"
+            }
+
+            output_path = args.output.format(**tokens)
+
+            if args.debug:
+                print(f"Original output path: {args.output}")
+                print(f"Tokens: {tokens}")
+                print(f"Replaced output path: {output_path}")
+
+            # Create output directory if it doesn't exist
+            output_dir = os.path.dirname(output_path)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+                if args.debug:
+                    print(f"Created output directory: {output_dir}")
+
+            # Generate avatar video
+            response = generate_avatar(
+                access_token=access_token,
+                text=para,
+                voice_id=vc['id'],
+                avatar_id=ac['id'],
+                locale_code=args.locale,
+                debug=args.debug
+            )
+
+            if response and 'jobId' in response and 'statusUrl' in response:
+                if args.debug:
+                    print(f"Job ID: {response['jobId']}")
+                    print("Polling for job completion...")
+
+                # Poll the status URL until the job is complete
+                result = check_job_status(response['statusUrl'], access_token, args.silent, args.debug, rate_limiter)
+
+                if result.get('status') == 'succeeded' and 'output' in result:
+                    # Extract video URL from the response
+                    output = result['output']
+                    video_url = None
+
+                    # Check for direct URL first
+                    if 'url' in output:
+                        video_url = output['url']
+                    # Check for nested destination URL (avatar API format)
+                    elif 'destination' in output and 'url' in output['destination']:
+                        video_url = output['destination']['url']
+
+                    if video_url:
+                        # Download the video file
                         try:
-                            # Generate avatar video
-                            if args.debug:
-                                print(f"\nGenerating avatar video with voice: {vc['id']} ({vc['name']} - {vc['style']})")
-                                print(f"Avatar: {ac['id']} ({ac['name']})")
-                                print(f"Processing paragraph {info['para_num']} of {info['total_paras']}")
-                                if info['is_split']:
-                                    print(f"Segment {info['sentence_num']} of {info['total_sentences']} sentences")
-                            
-                            # Create tokens for filename
-                            tokens = {
-                                'date': datetime.now().strftime('%Y-%m-%d'),
-                                'time': datetime.now().strftime('%H-%M-%S'),
-                                'datetime': datetime.now().strftime('%Y-%m-%d_%H-%M-%S'),
-                                'voice_id': vc['id'],
-                                'voice_name': vc['name'],
-                                'voice_style': vc['style'] or '',
-                                'avatar_id': ac['id'],
-                                'avatar_name': ac['name'],
-                                'locale_code': args.locale,
-                                'para_num': f"{info['para_num']:02d}",
-                                'total_paras': f"{info['total_paras']:02d}",
-                                'sentence_num': f"{info['sentence_num']:02d}",
-                                'total_sentences': f"{info['total_sentences']:02d}",
-                                'char_count': f"{info['char_count']:02d}"
-                            }
-                            
-                            # Add paragraph number to output path if splitting paragraphs
-                            if args.p_split:
-                                output_path = args.output.format(**tokens)
-                            else:
-                                output_path = args.output.format(**tokens)
-                            
                             if args.debug:
-                                print(f"Original output path: {args.output}")
-                                print(f"Tokens: {tokens}")
-                                print(f"Replaced output path: {output_path}")
-                            
-                            # Create output directory if it doesn't exist
-                            output_dir = os.path.dirname(output_path)
-                            if output_dir:
-                                os.makedirs(output_dir, exist_ok=True)
-                                if args.debug:
-                                    print(f"Created output directory: {output_dir}")
-                            
-                            # Generate avatar video
-                            response = generate_avatar(
-                                access_token=access_token,
-                                text=para,
-                                voice_id=vc['id'],
-                                avatar_id=ac['id'],
-                                locale_code=args.locale,
-                                debug=args.debug
-                            )
-                            
-                            if response and 'jobId' in response and 'statusUrl' in response:
-                                if args.debug:
-                                    print(f"Job ID: {response['jobId']}")
-                                    print("Polling for job completion...")
-                                
-                                # Poll the status URL until the job is complete
-                                result = check_job_status(response['statusUrl'], access_token, args.silent, args.debug, rate_limiter)
-                                
-                                if result.get('status') == 'succeeded' and 'output' in result:
-                                    # Extract video URL from the response
-                                    output = result['output']
-                                    video_url = None
-                                    
-                                    # Check for direct URL first
-                                    if 'url' in output:
-                                        video_url = output['url']
-                                    # Check for nested destination URL (avatar API format)
-                                    elif 'destination' in output and 'url' in output['destination']:
-                                        video_url = output['destination']['url']
-                                    
-                                    if video_url:
-                                        # Download the video file
-                                        try:
-                                            if args.debug:
-                                                print(f"Making request to download file from {video_url}")
-                                            response = requests.get(video_url, stream=True)
-                                            response.raise_for_status()
-                                            
-                                            # Ensure the output file has .mp4 extension
-                                            if not output_path.lower().endswith('.mp4'):
-                                                output_path = os.path.splitext(output_path)[0] + '.mp4'
-                                            
-                                            # Download the file
-                                            with open(output_path, 'wb') as f:
-                                                for chunk in response.iter_content(chunk_size=8192):
-                                                    if chunk:
-                                                        f.write(chunk)
-                                            
-                                            if not args.silent:
-                                                print(f"✓ Generated avatar video: {output_path}")
-                                            
-                                            return True
-                                            
-                                        except Exception as e:
-                                            if args.debug:
-                                                print(f"Error downloading file: {str(e)}")
-                                            return False
-                                    else:
-                                        if args.debug:
-                                            print(f"No video URL found in response: {result}")
-                                        return False
-                                else:
-                                    if args.debug:
-                                        print(f"Job failed or no output URL found: {result}")
-                                    return False
-                            else:
-                                if args.debug:
-                                    print(f"Invalid response from generate_avatar: {response}")
-                                return False
-                                
+                                print(f"Making request to download file from {video_url}")
+                            # Ensure the output file has .mp4 extension
+                            if not output_path.lower().endswith('.mp4'):
+                                output_path = os.path.splitext(output_path)[0] + '.mp4'
+
+                            # Download the file
+                            download_to_file(video_url, output_path)
+
+                            if not args.silent:
+                                print(f"✓ Generated avatar video: {output_path}")
+
+                            return True
+
                         except Exception as e:
                             if args.debug:
-                                print(f"Error in avatar task: {str(e)}")
+                                print(f"Error downloading file: {str(e)}")
                             return False
-                    
-                    return avatar_task
-                
-                task_func = create_avatar_task(voice_combo, avatar_combo, paragraph, info)
-                tasks.append((task_func,))  # Wrap in tuple as expected by process_tasks_parallel
+                    else:
+                        if args.debug:
+                            print(f"No video URL found in response: {result}")
+                        return False
+                else:
+                    if args.debug:
+                        print(f"Job failed or no output URL found: {result}")
+                    return False
+            else:
+                if args.debug:
+                    print(f"Invalid response from generate_avatar: {response}")
+                return False
+
+        except Exception as e:
+            if args.debug:
+                print(f"Error in avatar task: {str(e)}")
+            return False
+
+    # Create tasks for parallel processing: one per (voice, avatar, paragraph)
+    tasks = [
+        (avatar_task, vc, ac, para, info)
+        for vc, ac, (para, info) in itertools.product(
+            voice_combinations, avatar_combinations, zip(paragraphs, paragraph_info))
+    ]
 
     # Process tasks in parallel
     results = process_tasks_parallel(tasks, rate_limiter)
@@ -1493,62 +1544,64 @@ def handle_dub_command(args, access_token):
         output_format=args.format
     )
     
-    print(f"Job ID: {job_info['jobId']}")
-    print("Polling for job completion...")
+    # Poll until the job is complete, then download the dubbed media
+    run_job(job_info, access_token, [args.output], extract_urls=dubbed_media_urls,
+            silent=args.silent, debug=args.debug, verbose=True)
+
+def format_table(rows, headers):
+    """
+    Format rows as a plain-text table with left-aligned, padded columns.
     
-    # Poll the status URL until the job is complete
-    result = check_job_status(job_info['statusUrl'], access_token, args.silent, args.debug)
+    Args:
+        rows (list): Rows of string cells
+        headers (list): Column headings
     
-    # Download the dubbed media
-    if 'result' in result and 'output' in result['result']:
-        media_url = result['result']['output']['url']
-        print(f"Downloading dubbed media to {args.output}...")
-        download_file(media_url, args.output, args.silent, args.debug)
+    Yields:
+        str: The header line, a separator line, then one line per row
+    """
+    widths = [len(header) for header in headers]
+    for row in rows:
+        for i, cell in enumerate(row):
+            if len(cell) > widths[i]:
+                widths[i] = len(cell)
+    template = ' | '.join(f'{{:<{width}}}' for width in widths) + '\n'
+    yield template.format(*headers)
+    yield '-+-'.join('-' * width for width in widths) + '\n'
+    for row in rows:
+        yield template.format(*row)
 
 def handle_voices_command(args, access_token):
     """Handle the list voices command."""
+    headers = ['ID', 'Name', 'Gender', 'Style', 'Type', 'Status']
+    # Voice fields shown in each column, in header order
+    fields = ('voiceId', 'displayName', 'gender', 'style', 'voiceType', 'status')
+
     # List available voices
     voices = get_available_voices(access_token)
     if voices:
-        # Sort voices by status (Active first) and then by name
-        active_voices = [v for v in voices if v.get('status') == 'Active']
-        inactive_voices = [v for v in voices if v.get('status') == 'Inactive']
-        
-        # Prepare table data
-        def prepare_voice_data(voice_list):
-            return [[
-                voice.get('voiceId', 'N/A'),
-                voice.get('displayName', 'N/A'),
-                voice.get('gender', 'N/A'),
-                voice.get('style', 'N/A'),
-                voice.get('voiceType', 'N/A'),
-                voice.get('status', 'N/A')
-            ] for voice in sorted(voice_list, key=lambda x: x.get('displayName', ''))]
-        
-        # Print active voices first
-        if active_voices:
-            print("\nActive Voices:")
-            active_table = prepare_voice_data(active_voices)
-            print(tabulate(
-                active_table,
-                headers=['ID', 'Name', 'Gender', 'Style', 'Type', 'Status'],
-                tablefmt='grid'
-            ))
-        
-        # Print inactive voices
-        if inactive_voices:
-            print("\nInactive Voices:")
-            inactive_table = prepare_voice_data(inactive_voices)
-            print(tabulate(
-                inactive_table,
-                headers=['ID', 'Name', 'Gender', 'Style', 'Type', 'Status'],
-                tablefmt='grid'
-            ))
+        # Sort by name once, then split by status in a single pass; each
+        # group keeps the name order
+        groups = {'Active': [], 'Inactive': []}
+        for voice in sorted(voices, key=lambda x: x.get('displayName', '')):
+            group = groups.get(voice.get('status'))
+            if group is not None:
+                group.append(tuple(str(voice.get(field, 'N/A')) for field in fields))
+        
+        # Active voices first, then inactive ones, written in one call line by
+        # line instead of building each table as one string
+        def voice_tables():
+            for status, rows in groups.items():
+                if rows:
+                    yield f"\n{status} Voices:\n"
+                    yield from format_table(rows, headers)
+        sys.stdout.writelines(voice_tables())
     else:
         print("No voices found or error occurred")
 
 def handle_avatar_list_command(args, access_token):
     """Handle the avatar-list command."""
+    from tabulate import tabulate
+
     # List available avatars
     avatars = get_available_avatars(access_token)
     if avatars:
@@ -1597,6 +1650,24 @@ def format_time(seconds):
     seconds = int(seconds % 60)
     return f"{minutes:02d}:{seconds:02d}"
 
+def transcript_markdown_sections(transcription_data):
+    """
+    Format transcript segments as Markdown, one chunk at a time.
+    
+    Args:
+        transcription_data (iterable): Segments as [start, end, text, speaker]
+    
+    Returns:
+        Iterator[str]: The document heading, then one section per segment
+    """
+    yield "# Transcription\n\n"
+    for start_time, end_time, text, speaker, *_ in transcription_data:
+        yield (
+            f"### {speaker}\n\n"
+            f"*Time Range:* {format_time(start_time)} - {format_time(end_time)}\n\n"
+            f"{text}\n\n"
+        )
+
 def handle_transcribe_command(args, access_token):
     """Handle the transcribe command"""
     try:
@@ -1615,9 +1686,6 @@ def handle_transcribe_command(args, access_token):
             print("2. Set --output-type to 'markdown' to match the file extension")
             sys.exit(1)
         
-        # Get access token
-        access_token = retrieve_access_token(debug=args.debug)
-        
         # Upload file to Azure Storage
         print(f"Uploading file to Azure Storage: {args.input}")
         source_url = upload_to_azure_storage(args.input, debug=args.debug)
@@ -1649,49 +1717,30 @@ def handle_transcribe_command(args, access_token):
         if args.debug:
             print(f"Downloading transcription from: {transcription_url}")
         
-        # Download the transcription
-        response = requests.get(transcription_url)
-        response.raise_for_status()
-        transcription_data = response.json()
-        
         # Convert output path to absolute path and create directory if needed
         output_path = os.path.abspath(args.output)
         output_dir = os.path.dirname(output_path)
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
         
+        # Download the transcription. Text and markdown output are written
+        # segment by segment while the body is still arriving
+        response = SESSION.get(transcription_url, stream=True)
+        response.raise_for_status()
+        transcription_data = iter_json_array(response)
+        
         # Process the output based on the format
         if args.output_type == 'markdown':
-            # Convert to markdown format
-            markdown_content = "# Transcription\n\n"
-            for item in transcription_data:
-                start_time = item[0]
-                end_time = item[1]
-                text = item[2]
-                speaker = item[3]
-                
-                markdown_content += f"### {speaker}\n\n"
-                markdown_content += f"*Time Range:* {format_time(start_time)} - {format_time(end_time)}\n\n"
-                markdown_content += f"{text}\n\n"
-            
             # Write markdown file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(markdown_content)
+            with response, open(output_path, 'w', encoding='utf-8') as f:
+                f.writelines(transcript_markdown_sections(transcription_data))
             
             print(f"Transcription saved as markdown to: {output_path}")
             
         elif args.output_type == 'pdf':
-            # First create markdown content
-            markdown_content = "# Transcription\n\n"
-            for item in transcription_data:
-                start_time = item[0]
-                end_time = item[1]
-                text = item[2]
-                speaker = item[3]
-                
-                markdown_content += f"### {speaker}\n\n"
-                markdown_content += f"*Time Range:* {format_time(start_time)} - {format_time(end_time)}\n\n"
-                markdown_content += f"{text}\n\n"
+            # First create markdown content; the PDF renderer needs all of it
+            with response:
+                markdown_content = "".join(transcript_markdown_sections(transcription_data))
             
             # Try to convert markdown to PDF
             try:
@@ -1746,16 +1795,14 @@ def handle_transcribe_command(args, access_token):
             
         else:  # text format
             # Write only the text content with double newlines between items
-            with open(output_path, 'w', encoding='utf-8') as f:
-                for item in transcription_data:
-                    f.write(f"{item[2]}\n\n")
+            with response, open(output_path, 'w', encoding='utf-8') as f:
+                f.writelines(f"{item[2]}\n\n" for item in transcription_data)
             
             print(f"Transcription saved as text to: {output_path}")
             
     except Exception as e:
         print(f"Error: {str(e)}")
         if args.debug:
-            import traceback
             print(traceback.format_exc())
         sys.exit(1)
 
@@ -1771,8 +1818,8 @@ def handle_expand_command(args, access_token):
 
     # Create output directory if it doesn't exist
     output_dir = os.path.dirname(args.output)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
 
     # Call expand_image
     job_info = expand_image(
@@ -1793,24 +1840,13 @@ def handle_expand_command(args, access_token):
         seeds=args.seeds,
         debug=args.debug
     )
-    print(f"Job ID: {job_info['jobId']}")
-    print("Polling for job completion...")
-    result = check_job_status(job_info['statusUrl'], access_token, args.silent, args.debug)
-    if 'result' in result and 'outputs' in result['result']:
-        outputs = result['result']['outputs']
-        for idx, output in enumerate(outputs, 1):
-            image_url = output['image']['url']
-            output_filename = args.output.replace("{n}", str(idx))
-            print(f"Downloading expanded image to {output_filename}...")
-            download_file(image_url, output_filename, args.silent, args.debug)
-    else:
+    output_files = [args.output.replace("{n}", str(idx)) for idx in range(1, args.numVariations + 1)]
+    if not run_job(job_info, access_token, output_files,
+                   silent=args.silent, debug=args.debug, verbose=True):
         print("No outputs found in response.")
 
 def handle_fill_command(args, access_token):
     """Handle the Generative Fill command."""
-    import subprocess
-    import os.path
-    
     # Validate numVariations
     if not 1 <= args.numVariations <= 4:
         print("Error: Number of variations (-n) must be between 1 and 4")
@@ -1818,17 +1854,17 @@ def handle_fill_command(args, access_token):
 
     # Create output directory if it doesn't exist
     output_dir = os.path.dirname(args.output)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
 
     # Parse prompt variations
     prompts, variation_blocks = parse_prompt_variations(args.prompt)
     total_variations = len(prompts)
 
     # Get throttle limit from environment
-    throttle_limit = int(os.getenv('THROTTLE_LIMIT_FIREFLY', 5))
-    throttle_period = int(os.getenv('THROTTLE_PERIOD_SECONDS', 60))
-    throttle_min_delay = float(os.getenv('THROTTLE_MIN_DELAY_SECONDS', 0.0))
+    throttle_limit = THROTTLE_LIMIT
+    throttle_period = THROTTLE_PERIOD
+    throttle_min_delay = THROTTLE_MIN_DELAY
     rate_limiter = RateLimiter(throttle_limit, throttle_period, throttle_min_delay)
 
     if not args.silent:
@@ -1837,36 +1873,14 @@ def handle_fill_command(args, access_token):
         print(f'  • {args.numVariations} variations per prompt')
         print(f'Using parallel processing with rate limit of {throttle_limit} calls per minute\n')
 
-    # Invert the mask if --mask-invert is set
-    if args.mask_invert:
-        if args.debug:
-            print(f"Inverting mask: {args.mask}")
-        
-        # Get the original filename without path
-        original_filename = os.path.basename(args.mask)
-        # Create path in /tmp with same filename
-        inverted_mask_path = os.path.join('/tmp', original_filename)
-        
-        try:
-            # Run ImageMagick convert command
-            result = subprocess.run(['convert', args.mask, '-negate', inverted_mask_path], 
-                                 check=True, 
-                                 capture_output=True, 
-                                 text=True)
-            if args.debug:
-                print(f"ImageMagick output: {result.stdout}")
-                print(f"Inverted mask saved to: {inverted_mask_path}")
-            mask_path = inverted_mask_path
-        except subprocess.CalledProcessError as e:
-            print(f"Error inverting mask: {e.stderr}")
-            sys.exit(1)
-    else:
-        mask_path = args.mask
-
+    # Let the service invert the mask when --mask-invert is set instead of
+    # writing an inverted copy locally
+    mask_path = args.mask
     if args.debug:
-        print(f"Using mask path: {mask_path}")
+        print(f"Using mask path: {mask_path} (invert: {bool(args.mask_invert)})")
 
     def fill_task(prompt, j):
+        start_time = time.time()
         rate_limiter.acquire()
         tokens = {
             'prompt': prompt,
@@ -1884,7 +1898,7 @@ def handle_fill_command(args, access_token):
                 negative_prompt=args.negative_prompt,
                 prompt_biasing_locale=args.locale,
                 num_variations=1,
-                mask_invert=False,  # We've already inverted the mask if needed
+                mask_invert=args.mask_invert,
                 height=args.height,
                 width=args.width,
                 seeds=args.seeds,
@@ -1897,49 +1911,76 @@ def handle_fill_command(args, access_token):
             if 'result' in result and 'outputs' in result['result']:
                 outputs = result['result']['outputs']
                 if outputs:
+                    # The download goes to a storage URL that isn't rate limited,
+                    # so it runs on its own pool and frees this worker for the
+                    # next generation
                     image_url = outputs[0]['image']['url']
-                    if args.debug:
-                        print(f"Downloading image to {output_filename}...")
-                    download_file(image_url, output_filename, args.silent, args.debug)
-                    return True
+                    return download_pool.submit(download_fill_result, image_url, output_filename, start_time)
+            print(f"✗ Failed: {os.path.basename(output_filename)} ({time.time() - start_time:.1f}s)")
             return False
         except Exception as e:
-            print(f"Error generating fill: {str(e)}")
+            print(f"Error generating fill: {str(e)} ({time.time() - start_time:.1f}s)")
             if args.debug:
-                import traceback
                 traceback.print_exc()
             return False
 
-    # Create tasks for parallel processing
-    tasks = []
-    current_generation = 0
+    def download_fill_result(image_url, output_filename, start_time):
+        if args.debug:
+            print(f"Downloading image to {output_filename}...")
+        if not download_file(image_url, output_filename, args.silent, args.debug):
+            print(f"✗ Failed: {os.path.basename(output_filename)} ({time.time() - start_time:.1f}s)")
+            return False
+        if not args.silent:
+            print(f"✓ Generated: {os.path.basename(output_filename)} ({time.time() - start_time:.1f}s)")
+        return True
+
+    # Build the full work list up front so every task can be submitted at once
+    work = [(prompt, j) for prompt in prompts for j in range(args.numVariations)]
 
     # Prepare the table header
     if not args.silent:
         print("Generation Tasks:")
         print(f"{'#':<4} {'Prompt':<40}")
         print("-" * 45)
+        for current_generation, (prompt, _) in enumerate(work, 1):
+            print(f"{current_generation:<4} {prompt[:40]:<40}")
+
+    # Submit everything, then drain results as they finish. Each task
+    # acquires the rate limiter itself, so submission never blocks.
+    completed = 0
+    succeeded = 0
+
+    def record(result):
+        nonlocal completed, succeeded
+        completed += 1
+        if result:
+            succeeded += 1
+        if not args.silent:
+            print(f"Progress: {completed}/{len(futures)} tasks finished")
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=throttle_limit) as executor:
-        for prompt in prompts:
-            for j in range(args.numVariations):
-                current_generation += 1
-                if not args.silent:
-                    print(f"{current_generation:<4} {prompt[:40]:<40}")
-                tasks.append(executor.submit(fill_task, prompt, j))
-        for future in concurrent.futures.as_completed(tasks):
-            future.result()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=16) as download_pool, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=throttle_limit) as executor:
+        futures = [executor.submit(fill_task, prompt, j) for prompt, j in work]
+        downloads = []
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            if isinstance(result, concurrent.futures.Future):
+                downloads.append(result)
+            else:
+                record(result)
+        for future in concurrent.futures.as_completed(downloads):
+            record(future.result())
 
     if not args.silent:
-        print("\nAll fill generation tasks completed.")
+        print(f"\nAll fill generation tasks completed ({succeeded} of {len(futures)} succeeded).")
 
 def handle_mask_command(args, access_token):
     """Handle the mask command."""
     try:
         # Create output directory if it doesn't exist
         output_dir = os.path.dirname(args.output)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
         
         # Get unique filename if needed
         output_filename = get_unique_filename(args.output, args.overwrite, args.debug)
@@ -1956,10 +1997,9 @@ def handle_mask_command(args, access_token):
             debug=args.debug
         )
         
-        # If mask-invert is set, use ImageMagick to invert the mask
+        # If mask-invert is set, invert the saved mask in place
         if args.mask_invert:
-            import subprocess
-            subprocess.run(['convert', output_filename, '-negate', output_filename], check=True)
+            invert_mask(output_filename, output_filename, args.debug)
         
         if args.debug:
             print(f"Mask created successfully: {output_filename}")
@@ -1970,21 +2010,17 @@ def handle_mask_command(args, access_token):
         print(f"Error creating mask: {str(e)}")
         sys.exit(1)
 
-def handle_replace_bg_command(args, access_token):
+def handle_replace_bg_command(args, access_token, token_cache=None):
     """Handle the replace background command."""
-    import tempfile
-    import subprocess
-    from utils.filename import get_unique_filename, parse_prompt_variations
-    import time
-
-    # Handle wildcard input files
-    input_files = glob.glob(args.input)
-    if not input_files:
+
+    # Handle wildcard input files. Matches are streamed so work can start on
+    # the first file while the rest of the pattern is still being expanded.
+    input_files = glob.iglob(args.input)
+    first_file = next(input_files, None)
+    if first_file is None:
         print(f"No files found matching pattern: {args.input}")
         sys.exit(1)
-
-    if not args.silent:
-        print(f"Found {len(input_files)} files to process")
+    input_files = itertools.chain([first_file], input_files)
 
     # Parse prompt variations
     prompts, variation_blocks = parse_prompt_variations(args.prompt)
@@ -1992,23 +2028,84 @@ def handle_replace_bg_command(args, access_token):
 
     # Get throttle limit from environment - reduce it for mask operations
     throttle_limit = int(os.getenv('THROTTLE_LIMIT_FIREFLY', 2))  # Reduced from 5 to 2
-    throttle_period = int(os.getenv('THROTTLE_PERIOD_SECONDS', 60))
-    throttle_min_delay = float(os.getenv('THROTTLE_MIN_DELAY_SECONDS', 0.0))
+    throttle_period = THROTTLE_PERIOD
+    throttle_min_delay = THROTTLE_MIN_DELAY
     rate_limiter = RateLimiter(throttle_limit, throttle_period, throttle_min_delay)
+    use_cache = cache_enabled(args.no_cache)
+    # Long batches can outlive the access token, so tasks fetch it from a
+    # cache that refreshes it on expiry or after a 401
+    if token_cache is None:
+        token_cache = TokenCache(access_token, debug=args.debug)
 
     if not args.silent:
         print(f'Generating {total_variations} total variations:')
         print(f'  • {total_variations} prompt variations')
         print(f'Using parallel processing with rate limit of {throttle_limit} calls per minute\n')
 
+    # The mask only depends on the input image, so it is created once per file
+    # and shared by every prompt variation for that file
+    mask_paths = {}
+    # Lock and mask path for each input file, registered as files are submitted
+    mask_slots = {}
+
+    def get_mask(input_file, token):
+        mask_lock, mask_path = mask_slots[input_file]
+        with mask_lock:
+            if input_file in mask_paths:
+                return mask_paths[input_file], False
+            # This task is the one creating the mask, so reserve the mask
+            # call together with its own fill request
+            rate_limiter.acquire_many(2)
+            if not args.silent:
+                print(f"Creating mask for {input_file}...")
+            if not create_mask(
+                access_token=token,
+                image_path=input_file,
+                output_path=mask_path,
+                debug=args.debug
+            ):
+                return None, True
+            mask_paths[input_file] = mask_path
+            return mask_path, True
+
+    def finish_replace_bg_task(input_file, fill_result, output_filename, key):
+        try:
+            # Poll for job completion
+            if args.debug:
+                print(f"Job ID: {fill_result['jobId']}")
+                print("Polling for job completion...")
+            # The token may expire while the job is running
+            result = token_cache.call(lambda token: check_job_status(fill_result['statusUrl'], token, args.silent, args.debug))
+
+            if 'result' in result and 'outputs' in result['result']:
+                outputs = result['result']['outputs']
+                if outputs:
+                    if not args.silent:
+                        print(f"Saving result to: {output_filename}")
+                    downloaded = download_file(outputs[0]['image']['url'], output_filename, args.silent, args.debug)
+                    if downloaded and key:
+                        store_cached(key, output_filename, args.debug)
+                    return True
+                else:
+                    print(f"No outputs found in response for {input_file}")
+                    return False
+            else:
+                print(f"Failed to get result from job for {input_file}")
+                return False
+        except Exception as e:
+            print(f"Error processing {input_file}: {str(e)}")
+            if args.debug:
+                traceback.print_exc()
+            return False
+
     def replace_bg_task(input_file, prompt, index):
         max_retries = 3
         retry_delay = 70  # seconds
         
         for attempt in range(max_retries):
             try:
-                rate_limiter.acquire()
-                
+                token = token_cache.get_token()
+
                 # Get the base filename without extension
                 input_filename = os.path.splitext(os.path.basename(input_file))[0]
                 
@@ -2018,74 +2115,56 @@ def handle_replace_bg_command(args, access_token):
                     output_filename = output_filename.replace("{var1}", str(index + 1))
                 output_filename = get_unique_filename(output_filename, args.overwrite, args.debug)
 
+                # Reuse a previous result for the same input image and prompt
+                key = cache_key(input_file, prompt, 'replace_bg') if use_cache else None
+                if key and fetch_cached(key, output_filename, args.debug):
+                    if not args.silent:
+                        print(f"Using cached result for {input_file} with prompt: {prompt}")
+                    return True
+
                 if not args.silent:
                     print(f"Processing {input_file} with prompt: {prompt}")
 
-                # Create temporary directory for mask files
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    # Step 1: Create mask
-                    mask_path = os.path.join(temp_dir, "mask.png")
-                    if not args.silent:
-                        print("Creating mask...")
-                    mask_result = create_mask(
-                        access_token=access_token,
-                        image_path=input_file,
-                        output_path=mask_path,
-                        debug=args.debug
-                    )
-                    if not mask_result:
-                        print(f"Failed to create mask for {input_file}")
-                        return False
-
-                    # Step 2: Invert mask using ImageMagick
-                    inverted_mask_path = os.path.join(temp_dir, "inverted_mask.png")
-                    if not args.silent:
-                        print("Inverting mask...")
-                    try:
-                        subprocess.run(['magick', mask_path, '-negate', inverted_mask_path], check=True)
-                    except subprocess.CalledProcessError as e:
-                        print(f"Error inverting mask for {input_file}: {str(e)}")
-                        return False
+                # Step 1: Get the mask (created once per input file). Cache
+                # hits above never reach this, so they use no rate-limit tokens
+                mask_path, reserved = get_mask(input_file, token)
+                if not mask_path:
+                    print(f"Failed to create mask for {input_file}")
+                    return False
+                if not reserved:
+                    # The mask already existed; reserve just the fill request
+                    rate_limiter.acquire()
 
-                    # Step 3: Generate new background
-                    if not args.silent:
-                        print("Generating new background...")
-                    fill_result = fill_image(
-                        access_token=access_token,
-                        image_path=input_file,
-                        mask_path=inverted_mask_path,
-                        prompt=prompt,
-                        num_variations=1,
-                        mask_invert=True,
-                        debug=args.debug
-                    )
+                # Step 2: Generate new background. Negating the mask locally and
+                # then asking the service to invert it again cancels out, so the
+                # mask from step 1 is uploaded as-is.
+                if not args.silent:
+                    print("Generating new background...")
+                fill_result = fill_image(
+                    access_token=token,
+                    image_path=input_file,
+                    mask_path=mask_path,
+                    prompt=prompt,
+                    num_variations=1,
+                    mask_invert=False,
+                    debug=args.debug
+                )
 
-                    if not fill_result:
-                        print(f"Failed to generate new background for {input_file}")
-                        return False
+                if not fill_result:
+                    print(f"Failed to generate new background for {input_file}")
+                    return False
 
-                    # Poll for job completion
-                    if args.debug:
-                        print(f"Job ID: {fill_result['jobId']}")
-                        print("Polling for job completion...")
-                    result = check_job_status(fill_result['statusUrl'], access_token, args.silent, args.debug)
+                # Step 3: Hand the job to the poll stage so this worker can
+                # move on to the next submission while the job runs
+                return poll_pool.submit(finish_replace_bg_task, input_file, fill_result, output_filename, key)
 
-                    if 'result' in result and 'outputs' in result['result']:
-                        outputs = result['result']['outputs']
-                        if outputs:
-                            if not args.silent:
-                                print(f"Saving result to: {output_filename}")
-                            download_file(outputs[0]['image']['url'], output_filename, args.silent, args.debug)
-                            return True
-                        else:
-                            print(f"No outputs found in response for {input_file}")
-                            return False
-                    else:
-                        print(f"Failed to get result from job for {input_file}")
-                        return False
-                        
             except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 429:
+                if e.response.status_code == 401 and attempt < max_retries - 1:
+                    if not args.silent:
+                        print(f"\nAccess token rejected for {input_file}. Refreshing and retrying...")
+                    token_cache.refresh(token)
+                    continue
+                elif e.response.status_code == 429:
                     if attempt < max_retries - 1:
                         print(f"\nReceived 429 (Too Many Requests) error for {input_file}. Waiting {retry_delay} seconds before retry {attempt + 2}/{max_retries}...")
                         time.sleep(retry_delay)
@@ -2099,7 +2178,6 @@ def handle_replace_bg_command(args, access_token):
             except Exception as e:
                 print(f"Error processing {input_file}: {str(e)}")
                 if args.debug:
-                    import traceback
                     traceback.print_exc()
                 return False
 
@@ -2113,18 +2191,106 @@ def handle_replace_bg_command(args, access_token):
         print(f"{'#':<4} {'Input File':<30} {'Prompt':<40}")
         print("-" * 75)
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=throttle_limit) as executor:
-        for input_file in input_files:
+    # Two stages: submit workers create masks and submit fill jobs, bounded by
+    # the rate limit; poll workers wait for the jobs and download the results.
+    # Submission for the next image overlaps with polling for earlier ones.
+    # Executors only start threads as work arrives, so the limits below are
+    # upper bounds even for small batches
+    max_workers = max(1, throttle_limit)
+    poll_workers = max_workers * 4
+    succeeded = 0
+    # The mask directory is listed first so it is removed only after both
+    # pools have shut down, and also when a task raises
+    with tempfile.TemporaryDirectory() as mask_dir, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=poll_workers) as poll_pool, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for file_index, input_file in enumerate(input_files):
+            mask_slots[input_file] = (threading.Lock(), os.path.join(mask_dir, f"mask_{file_index}.png"))
             for i, prompt in enumerate(prompts):
                 current_generation += 1
                 if not args.silent:
                     print(f"{current_generation:<4} {os.path.basename(input_file):<30} {prompt[:40]:<40}")
                 tasks.append(executor.submit(replace_bg_task, input_file, prompt, i))
+        poll_futures = []
         for future in concurrent.futures.as_completed(tasks):
-            future.result()
+            result = future.result()
+            if isinstance(result, concurrent.futures.Future):
+                poll_futures.append(result)
+            elif result:
+                succeeded += 1
+        for future in concurrent.futures.as_completed(poll_futures):
+            if future.result():
+                succeeded += 1
 
     if not args.silent:
-        print("\nAll background replacement tasks completed.")
+        print(f"\nAll background replacement tasks completed ({succeeded} of {len(tasks)} succeeded across {len(mask_slots)} files).")
+
+# How long check_job_status asks the server to hold a status request open
+STATUS_LONG_POLL_SECONDS = 30
+# (connect, read) timeouts for a status request; the read timeout leaves
+# room for the server to hold the request for the full long-poll window
+STATUS_REQUEST_TIMEOUT = (10, STATUS_LONG_POLL_SECONDS + 15)
+# Consecutive timed-out status requests after which polling gives up
+STATUS_MAX_READ_TIMEOUTS = 3
+# Whether status polls count against the caller's rate limiter
+THROTTLE_STATUS_REQUESTS = os.getenv('THROTTLE_STATUS_REQUESTS', 'true').lower() == 'true'
+# Bounds for the exponential backoff between status polls
+STATUS_MIN_INTERVAL = float(os.getenv('FIREFLY_STATUS_MIN_INTERVAL', 0.25))
+STATUS_MAX_INTERVAL = float(os.getenv('FIREFLY_STATUS_MAX_INTERVAL', 5.0))
+# Job progress (percent) at which polling speeds back up
+STATUS_NEARLY_DONE_PROGRESS = 80
+
+@functools.lru_cache(maxsize=4)
+def _status_headers(access_token):
+    """
+    Build the job status request headers once per access token. Every poll of
+    every job reuses the same dict, so callers must not modify it.
+    """
+    return api_headers(access_token, {
+        'Accept': 'application/json',
+        # Ask the server to hold the request until the job changes state
+        # (RFC 7240 long-polling); servers that don't support it ignore this
+        'Prefer': f'wait={STATUS_LONG_POLL_SECONDS}'
+    })
+
+def is_auth_error(error):
+    """
+    Check whether an exception is an authentication or authorization failure.
+    These affect every request made with the same token, so batch commands
+    stop instead of failing each remaining task one by one.
+    
+    Args:
+        error (Exception): The exception raised by an API call
+    
+    Returns:
+        bool: True for HTTP 401 and 403 responses
+    """
+    # Error responses are falsy, so compare against None explicitly
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in (401, 403)
+
+def _retry_after_seconds(response):
+    """
+    Get the number of seconds a response asks the client to wait.
+    
+    Args:
+        response (requests.Response): The HTTP response
+    
+    Returns:
+        float: Seconds to wait, or None if there is no usable Retry-After header
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
 
 def check_job_status(status_url, access_token, silent=False, debug=False, rate_limiter=None):
     """
@@ -2143,35 +2309,85 @@ def check_job_status(status_url, access_token, silent=False, debug=False, rate_l
     Raises:
         Exception: If the job fails or encounters an error
     """
-    headers = {
-        'Accept': 'application/json',
-        'x-api-key': os.environ['FIREFLY_SERVICES_CLIENT_ID'],
-        'Authorization': f'Bearer {access_token}'
-    }
+    headers = _status_headers(access_token)
 
     # Check if status requests should be throttled
-    throttle_status = os.getenv('THROTTLE_STATUS_REQUESTS', 'true').lower() == 'true'
+    throttle_status = THROTTLE_STATUS_REQUESTS
+
+    # Poll quickly at first so short jobs return promptly, then back off
+    # exponentially so long jobs don't burn through the rate limit
+    delays = poll_delays(STATUS_MIN_INTERVAL, STATUS_MAX_INTERVAL)
+    nearly_done = False
+    # Validator from the last status response, for conditional requests
+    etag = None
+    # Timed-out status requests in a row, so a stalled server can't keep
+    # polling going forever
+    read_timeouts = 0
 
     while True:
         # Apply rate limiting if provided and enabled for status requests
         if rate_limiter and throttle_status:
             rate_limiter.acquire()
             
-        response = requests.get(status_url, headers=headers)
-        response.raise_for_status()
-        status_data = response.json()
-        
-        if debug:
-            print("\nStatus Response:", status_data)
-        
-        if status_data.get('status') == 'succeeded' or status_data.get('status') == 'done':
-            return status_data
-        elif status_data.get('status') == 'failed':
-            raise Exception(f"Job failed: {status_data.get('error', 'Unknown error')}")
-        
+        try:
+            # Ask for the body only if the status changed since the last poll;
+            # the shared header dict is copied rather than modified
+            request_headers = {**headers, 'If-None-Match': etag} if etag else headers
+            response = SESSION.get(status_url, headers=request_headers, timeout=STATUS_REQUEST_TIMEOUT)
+        except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError) as e:
+            if not is_read_timeout(e):
+                raise
+            read_timeouts += 1
+            if read_timeouts >= STATUS_MAX_READ_TIMEOUTS:
+                raise Exception(f"Status request timed out {read_timeouts} times in a row") from e
+            # A held-open request that outlives the long-poll window just means
+            # nothing changed yet; reopen it straight away
+            if debug:
+                print("Status request timed out, polling again...")
+            continue
+        read_timeouts = 0
+        retry_after = _retry_after_seconds(response)
+        if response.status_code == 429 and retry_after is not None:
+            if debug:
+                print(f"Status polling throttled, retrying in {retry_after:.1f} seconds...")
+            time.sleep(retry_after)
+            continue
+        if response.status_code == 304:
+            # Nothing changed, so the last status still applies
+            if debug:
+                print("\nStatus unchanged")
+        else:
+            response.raise_for_status()
+            status_data = parse_json(response)
+            etag = response.headers.get('ETag')
+            
+            if debug:
+                print("\nStatus Response:", status_data)
+            
+            if status_data.get('status') == 'succeeded' or status_data.get('status') == 'done':
+                return status_data
+            elif status_data.get('status') == 'failed':
+                raise Exception(f"Job failed: {status_data.get('error', 'Unknown error')}")
+        
+        # Once the job reports it is nearly done, start the backoff over so
+        # the finish isn't missed by a long wait
+        progress = status_data.get('progress')
+        if not nearly_done and isinstance(progress, (int, float)) and progress >= STATUS_NEARLY_DONE_PROGRESS:
+            nearly_done = True
+            delays = poll_delays(STATUS_MIN_INTERVAL, STATUS_MAX_INTERVAL)
+        
+        # Advance the backoff on every poll, even when the wait comes from
+        # the server instead
+        wait = next(delays)
+        if retry_after is not None:
+            wait = retry_after
+        elif 'wait' in response.headers.get('Preference-Applied', ''):
+            # The server already held the request open, so poll again right away
+            wait = 0
         if debug:
-            print("Waiting for job completion...")
-        time.sleep(2)  # Wait 2 seconds before checking again
+            print(f"Waiting {wait:.1f} seconds for job completion...")
+        if wait:
+            time.sleep(wait)
 
 def download_file(url, output_file, silent=False, debug=False):
     """
@@ -2195,13 +2411,7 @@ def download_file(url, output_file, silent=False, debug=False):
         if debug:
             print(f"Downloading from {url} to {output_file}")
         
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        with open(output_file, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+        download_to_file(url, output_file)
         
         if debug:
             print(f"Successfully downloaded to {output_file}")
@@ -2209,10 +2419,129 @@ def download_file(url, output_file, silent=False, debug=False):
     except Exception as e:
         print(f"Error downloading file: {str(e)}")
         if debug:
-            import traceback
             traceback.print_exc()
         return False
 
+# Upper bound on concurrent output downloads across all jobs
+MAX_PARALLEL_DOWNLOADS = 32
+
+_download_pool = None
+_download_pool_lock = threading.Lock()
+
+def get_download_pool():
+    """
+    Get the thread pool that fetches job outputs, creating it on first use.
+    Every job in a batch shares it, so each multi-output job doesn't start and
+    tear down threads of its own.
+    
+    Returns:
+        concurrent.futures.ThreadPoolExecutor: The shared download pool
+    """
+    global _download_pool
+    with _download_pool_lock:
+        if _download_pool is None:
+            _download_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=MAX_PARALLEL_DOWNLOADS, thread_name_prefix='download')
+        return _download_pool
+
+def image_output_urls(result):
+    """
+    Get the image URLs from a completed Firefly image job.
+    
+    Args:
+        result (dict): The completed job result from check_job_status
+    
+    Returns:
+        list: Image URLs in output order (empty if the job returned none)
+    """
+    outputs = result.get('result', {}).get('outputs') or []
+    return [output['image']['url'] for output in outputs]
+
+def dubbed_media_urls(result):
+    """
+    Get the media URL from a completed dubbing job.
+    
+    Args:
+        result (dict): The completed job result from check_job_status
+    
+    Returns:
+        list: The dubbed media URL, or an empty list if there is none
+    """
+    output = result.get('result', {}).get('output')
+    return [output['url']] if output else []
+
+def run_job(job_info, access_token, output_files, extract_urls=image_output_urls,
+            silent=False, debug=False, rate_limiter=None, verbose=None):
+    """
+    Wait for a submitted job to finish and download its outputs.
+    
+    Args:
+        job_info (dict): The submit response, with 'jobId' and 'statusUrl'
+        access_token (str): The authentication token
+        output_files (list): Output paths, one per result to download; results
+            beyond the number of paths are ignored
+        extract_urls (callable): Maps the completed job result to a list of URLs
+        silent (bool): Whether to suppress output messages
+        debug (bool): Whether to show debug information
+        rate_limiter: Optional rate limiter for throttling status requests
+        verbose (bool): Whether to print job and download progress; defaults to debug
+    
+    Returns:
+        list: Paths that were downloaded successfully (empty if the job had no outputs)
+    
+    Raises:
+        Exception: If the job fails or encounters an error
+    """
+    if verbose is None:
+        verbose = debug
+    if verbose:
+        print(f"Job ID: {job_info['jobId']}")
+        print("Polling for job completion...")
+    result = check_job_status(job_info['statusUrl'], access_token, silent, debug, rate_limiter)
+
+    downloads = list(zip(extract_urls(result), output_files))
+
+    def fetch(download):
+        url, output_file = download
+        if verbose:
+            print(f"Downloading to {output_file}...")
+        return download_file(url, output_file, silent, debug)
+
+    if len(downloads) > 1:
+        # Outputs are independent storage URLs, so fetch them concurrently
+        succeeded = list(get_download_pool().map(fetch, downloads))
+    else:
+        succeeded = [fetch(download) for download in downloads]
+    return [output_file for (_, output_file), ok in zip(downloads, succeeded) if ok]
+
+# Markdown-to-plain-text substitutions used by read_text_file, applied in order
+_EXTRA_BLANK_LINES = re.compile(r'\n{3,}')
+# Whitespace (other than the newline itself) at the start or end of any line
+_LINE_EDGE_WHITESPACE = re.compile(r'^[^\S\n]+|[^\S\n]+$', re.MULTILINE)
+_MARKDOWN_SUBSTITUTIONS = (
+    # Headers
+    (re.compile(r'^#+\s+', re.MULTILINE), ''),
+    # Bold/italic markers
+    (re.compile(r'[*_]{1,2}(.*?)[*_]{1,2}'), r'\1'),
+    # Code blocks
+    (re.compile(r'```.*?```', re.DOTALL), ''),
+    # Inline code
+    (re.compile(r'`(.*?)`'), r'\1'),
+    # Links
+    (re.compile(r'\[(.*?)\]\(.*?\)'), r'\1'),
+    # Horizontal rules
+    (re.compile(r'^[-*_]{3,}$', re.MULTILINE), ''),
+    # Blockquotes
+    (re.compile(r'^>\s+', re.MULTILINE), ''),
+    # List markers
+    (re.compile(r'^[-*+]\s+', re.MULTILINE), ''),
+    (re.compile(r'^\d+\.\s+', re.MULTILINE), ''),
+    # HTML tags
+    (re.compile(r'<[^>]+>'), ''),
+    # Multiple blank lines
+    (_EXTRA_BLANK_LINES, '\n\n'),
+)
+
 def read_text_file(file_path):
     """
     Read text from a file and preserve paragraph structure.
@@ -2229,40 +2558,20 @@ def read_text_file(file_path):
         Exception: If there's an error reading the file
     """
     try:
+        # Text mode's universal newlines already turn \r\n and \r into \n while
+        # decoding, so no separate normalization pass is needed
         with open(file_path, 'r', encoding='utf-8') as f:
-            # Read the file and normalize line endings
             content = f.read()
-            # Normalize all line endings to \n
-            content = content.replace('\r\n', '\n').replace('\r', '\n')
             
             # If it's a Markdown file, convert to plain text
             if file_path.lower().endswith('.md'):
-                # Remove Markdown headers
-                content = re.sub(r'^#+\s+', '', content, flags=re.MULTILINE)
-                # Remove bold/italic markers
-                content = re.sub(r'[*_]{1,2}(.*?)[*_]{1,2}', r'\1', content)
-                # Remove code blocks
-                content = re.sub(r'```.*?```', '', content, flags=re.DOTALL)
-                # Remove inline code
-                content = re.sub(r'`(.*?)`', r'\1', content)
-                # Remove links
-                content = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', content)
-                # Remove horizontal rules
-                content = re.sub(r'^[-*_]{3,}$', '', content, flags=re.MULTILINE)
-                # Remove blockquotes
-                content = re.sub(r'^>\s+', '', content, flags=re.MULTILINE)
-                # Remove list markers
-                content = re.sub(r'^[-*+]\s+', '', content, flags=re.MULTILINE)
-                content = re.sub(r'^\d+\.\s+', '', content, flags=re.MULTILINE)
-                # Remove HTML tags
-                content = re.sub(r'<[^>]+>', '', content)
-                # Remove multiple blank lines
-                content = re.sub(r'\n{3,}', '\n\n', content)
+                for pattern, replacement in _MARKDOWN_SUBSTITUTIONS:
+                    content = pattern.sub(replacement, content)
                 # Remove leading/trailing whitespace from each line
-                content = '\n'.join(line.strip() for line in content.split('\n'))
+                content = _LINE_EDGE_WHITESPACE.sub('', content)
             
             # Ensure paragraphs are separated by exactly two newlines
-            content = re.sub(r'\n{3,}', '\n\n', content)
+            content = _EXTRA_BLANK_LINES.sub('\n\n', content)
             return content.strip()
     except FileNotFoundError:
         raise FileNotFoundError(f"Text file not found: {file_path}")
@@ -2290,52 +2599,57 @@ def get_text_from_file_or_input(text, file_path):
             return None
     return None
 
-def process_tasks_parallel(tasks, rate_limiter):
+def process_tasks_parallel(tasks, rate_limiter, max_retries=3, retry_delay=5.0):
     """
     Process tasks in parallel with rate limiting.
     
+    The worker pool is capped at the rate limiter's call budget: tasks spend
+    almost all of their time blocked on HTTP, so more threads than the API
+    allows in flight would only sit waiting on the limiter. All tasks are
+    submitted up front and each worker acquires the rate limiter before
+    running its task.
+    
     Args:
         tasks (list): List of (task_function, *task_args) tuples
         rate_limiter (RateLimiter): Rate limiter instance
+        max_retries (int): Maximum retries for a task rejected with 429
+        retry_delay (float): Initial retry delay in seconds, doubled on each retry
     
     Returns:
         list: Results from all tasks
     """
+    def run_task(task_tuple, delay):
+        if delay:
+            time.sleep(delay)
+        rate_limiter.acquire()
+        task_func = task_tuple[0]
+        task_args = task_tuple[1:]  # Get all remaining elements as arguments
+        return task_func(*task_args)
+
     results = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        futures = []
-        for task_tuple in tasks:
-            task_func = task_tuple[0]
-            task_args = task_tuple[1:]  # Get all remaining elements as arguments
-            rate_limiter.acquire()
-            futures.append(executor.submit(task_func, *task_args))
-        
-        for future in concurrent.futures.as_completed(futures):
-            try:
-                result = future.result()
-                results.append(result)
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 429:
-                    print("\nReceived 429 (Too Many Requests) error. Waiting 70 seconds before retrying...")
-                    time.sleep(70)
-                    # Resubmit the task
-                    task_tuple = tasks[len(results)]  # Get the original task that failed
-                    task_func = task_tuple[0]
-                    task_args = task_tuple[1:]
-                    rate_limiter.acquire()
-                    new_future = executor.submit(task_func, *task_args)
-                    try:
-                        result = new_future.result()
-                        results.append(result)
-                    except Exception as e:
-                        print(f"Error after retry: {str(e)}")
+    max_workers = max(1, min(len(tasks), rate_limiter.max_calls))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Track which task (and retry attempt) each future belongs to
+        future_to_task = {executor.submit(run_task, task_tuple, 0): (task_tuple, 0) for task_tuple in tasks}
+        
+        while future_to_task:
+            done, _ = concurrent.futures.wait(future_to_task, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                task_tuple, attempt = future_to_task.pop(future)
+                try:
+                    results.append(future.result())
+                except requests.exceptions.HTTPError as e:
+                    if e.response is not None and e.response.status_code == 429 and attempt < max_retries:
+                        retry_after = _retry_after_seconds(e.response)
+                        delay = retry_after if retry_after is not None else retry_delay * (2 ** attempt)
+                        print(f"\nReceived 429 (Too Many Requests) error. Retrying in {delay:.0f} seconds ({attempt + 1}/{max_retries})...")
+                        future_to_task[executor.submit(run_task, task_tuple, delay)] = (task_tuple, attempt + 1)
+                    else:
+                        print(f"HTTP Error: {str(e)}")
                         results.append(False)
-                else:
-                    print(f"HTTP Error: {str(e)}")
+                except Exception as e:
+                    print(f"Error: {str(e)}")
                     results.append(False)
-            except Exception as e:
-                print(f"Error: {str(e)}")
-                results.append(False)
     
     return results
 
@@ -2354,8 +2668,6 @@ def add_transcribe_command(subparsers):
 
 def handle_list_custom_models_command(args, access_token):
     """List available custom models for Firefly."""
-    import csv
-    import io
     def truncate(val, length=16):
         if not val:
             return ''
@@ -2368,20 +2680,12 @@ def handle_list_custom_models_command(args, access_token):
         if 'image4' in name:
             return 'image4'
         return name.split('_')[0]
-    api_key = os.environ.get('FIREFLY_SERVICES_CLIENT_ID')
-    if not api_key:
-        print("Error: FIREFLY_SERVICES_CLIENT_ID is not set in environment.")
-        sys.exit(1)
-    headers = {
-        'x-api-key': api_key,
-        'x-request-id': f'ffcli-{int(time.time())}',
-        'Authorization': f'Bearer {access_token}'
-    }
+    headers = api_headers(access_token, {'x-request-id': f'ffcli-{int(time.time())}'})
     url = 'https://firefly-api.adobe.io/v3/custom-models'
     try:
-        response = requests.get(url, headers=headers)
+        response = SESSION.get(url, headers=headers)
         response.raise_for_status()
-        data = response.json()
+        data = parse_json(response)
         
         if args.debug:
             print("=== Full API Response ===")
@@ -2394,19 +2698,12 @@ def handle_list_custom_models_command(args, access_token):
             return
         # Output all fields from the response
         if args.csv:
-            # Collect all unique keys from all models
-            all_keys = set()
-            for m in models:
-                all_keys.update(m.keys())
-            # Sort keys for consistency
-            all_keys = sorted(all_keys)
-            output = io.StringIO()
-            writer = csv.writer(output)
+            # Collect all unique keys from all models, in first-seen order
+            all_keys = list(dict.fromkeys(k for m in models for k in m))
+            writer = csv.writer(sys.stdout, lineterminator='\n')
             writer.writerow(all_keys)
             for m in models:
-                row = [m.get(k, '') for k in all_keys]
-                writer.writerow(row)
-            print(output.getvalue())
+                writer.writerow([m.get(k, '') for k in all_keys])
         else:
             try:
                 from rich.table import Table
@@ -2453,13 +2750,10 @@ def handle_list_custom_models_command(args, access_token):
     except Exception as e:
         print(f"Error fetching custom models: {e}")
         if args.debug:
-            import traceback
             traceback.print_exc()
 
 def handle_video_command(args, access_token):
     """Handle the video generation command."""
-    import time
-    import os
     
     # Validate output file extension
     if not args.output.lower().endswith('.mp4'):
@@ -2468,8 +2762,8 @@ def handle_video_command(args, access_token):
     
     # Ensure output directory exists
     output_dir = os.path.dirname(args.output)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
     
     # Check if file exists and handle overwrite
     if os.path.exists(args.output) and not args.overwrite:
@@ -2592,14 +2886,11 @@ def handle_video_command(args, access_token):
         elapsed_time = time.time() - start_time
         print(f"Error generating video: {e}")
         if args.debug:
-            import traceback
             traceback.print_exc()
         sys.exit(1)
 
 def handle_pdf_command(args, access_token):
     """Handle the PDF conversion/export command."""
-    import os
-    import glob
     
     # Handle wildcard patterns for OCR operations
     if args.ocr and ('*' in args.input or '?' in args.input):
@@ -2655,7 +2946,6 @@ def handle_pdf_command(args, access_token):
             except Exception as e:
                 print(f"✗ Error processing {pdf_file}: {e}")
                 if args.debug:
-                    import traceback
                     traceback.print_exc()
         
         if not args.silent:
@@ -2685,8 +2975,8 @@ def handle_pdf_command(args, access_token):
     # Create output directory if it doesn't exist
     if args.output:
         output_dir = os.path.dirname(args.output)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
     
     if args.export:
         # Export PDF to another format
@@ -3002,7 +3292,6 @@ def handle_pdf_convert(args, access_token):
     except Exception as e:
         print(f"Error converting to PDF: {e}")
         if args.debug:
-            import traceback
             traceback.print_exc()
         sys.exit(1)
 
@@ -3080,7 +3369,6 @@ def handle_pdf_export(args, access_token):
     except Exception as e:
         print(f"Error exporting PDF: {e}")
         if args.debug:
-            import traceback
             traceback.print_exc()
         sys.exit(1)
 
@@ -3155,7 +3443,6 @@ def handle_pdf_compress(args, access_token):
     except Exception as e:
         print(f"Error compressing PDF: {e}")
         if args.debug:
-            import traceback
             traceback.print_exc()
         sys.exit(1)
 
@@ -3237,7 +3524,6 @@ def handle_single_pdf_ocr(args, access_token):
     except Exception as e:
         print(f"Error performing OCR: {e}")
         if args.debug:
-            import traceback
             traceback.print_exc()
         return False
 
@@ -3315,7 +3601,6 @@ def handle_pdf_linearize(args, access_token):
     except Exception as e:
         print(f"Error linearizing PDF: {e}")
         if args.debug:
-            import traceback
             traceback.print_exc()
         sys.exit(1)
 
@@ -3381,13 +3666,11 @@ def handle_pdf_autotag(args, access_token):
     except Exception as e:
         print(f"Error auto-tagging PDF: {e}")
         if args.debug:
-            import traceback
             traceback.print_exc()
         sys.exit(1)
 
 def handle_pdf_upload_command(args, access_token):
     """Handle the PDF upload command."""
-    import os
     
     # Validate file exists
     if not os.path.exists(args.file):
@@ -3416,6 +3699,5 @@ def handle_pdf_upload_command(args, access_token):
     except Exception as e:
         print(f"Error uploading file: {e}")
         if args.debug:
-            import traceback
             traceback.print_exc()
         sys.exit(1)
\ No newline at end of file
@@ -1,11 +1,14 @@
 import sys
-from cli.parsers import create_parser
-from cli.commands import handle_command
+from cli.parsers import create_parser, command_from_argv
 
 def main():
-    parser = create_parser()
+    # Only the subcommand being run needs its arguments built
+    parser = create_parser(command_from_argv(sys.argv[1:]))
     args = parser.parse_args()
     
+    # Imported after parsing so --help and usage errors don't pay for loading
+    # the HTTP stack and service modules
+    from cli.commands import handle_command
     try:
         handle_command(args)
     except Exception as e:
@@ -1,5 +1,5 @@
 import os
-import requests
+from utils.http import SESSION
 
 def dub_media(access_token, source_url, target_locale, output_format="mp4"):
     """
@@ -35,7 +35,7 @@ def dub_media(access_token, source_url, target_locale, output_format="mp4"):
         }
     }
 
-    response = requests.post(
+    response = SESSION.post(
         'https://audio-video-api.adobe.io/v1/dub',
         headers=headers,
         json=data
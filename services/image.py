@@ -6,6 +6,7 @@ import time
 from itertools import product
 from utils.storage import upload_to_azure_storage
 from typing import Optional, List, Dict, Any, Union
+from utils.http import SESSION, download_to_file, poll_delays, parse_json
 
 def generate_image(access_token, prompt, num_generations=1, model_version='image3', content_class='photo',
                   negative_prompt=None, prompt_biasing_locale=None, size=None, seeds=None, debug=False,
@@ -123,7 +124,7 @@ def _generate_image_internal(access_token, prompt, num_generations=1, model_vers
         print("Request data:", json.dumps(data, indent=2))
         print("Request headers:", json.dumps(headers, indent=2))
     
-    response = requests.post(url, headers=headers, json=data)
+    response = SESSION.post(url, headers=headers, json=data)
     response.raise_for_status()
     return response.json()
 
@@ -266,7 +267,7 @@ def generate_similar_image(
     }
     
     # Make the API request
-    response = requests.post(
+    response = SESSION.post(
         'https://firefly-api.adobe.io/v3/images/generate-similar-async',
         headers=headers,
         json=payload
@@ -348,7 +349,7 @@ def expand_image(
     url = "https://firefly-api.adobe.io/v3/images/expand-async"
     if debug:
         print("Expand payload:", json.dumps(payload, indent=2))
-    response = requests.post(url, headers=headers, json=payload)
+    response = SESSION.post(url, headers=headers, json=payload)
     response.raise_for_status()
     return response.json()
 
@@ -415,7 +416,7 @@ def fill_image(
     url = "https://firefly-api.adobe.io/v3/images/fill-async"
     if debug:
         print("Fill payload:", json.dumps(payload, indent=2))
-    response = requests.post(url, headers=headers, json=payload)
+    response = SESSION.post(url, headers=headers, json=payload)
     response.raise_for_status()
     return response.json()
 
@@ -487,7 +488,7 @@ def create_mask(
     if debug:
         print("Mask creation payload:", json.dumps(payload, indent=2))
     
-    response = requests.post(url, headers=headers, json=payload)
+    response = SESSION.post(url, headers=headers, json=payload)
     response.raise_for_status()
     
     # Get the status URL from the response
@@ -497,11 +498,12 @@ def create_mask(
     if debug:
         print(f"Status URL: {status_url}")
     
-    # Poll the status URL until the job is complete
+    # Poll the status URL until the job is complete, backing off between polls
+    delays = poll_delays()
     while True:
-        status_response = requests.get(status_url, headers=headers)
+        status_response = SESSION.get(status_url, headers=headers)
         status_response.raise_for_status()
-        status_data = status_response.json()
+        status_data = parse_json(status_response)
         
         if debug:
             print("Status response:", json.dumps(status_data, indent=2))
@@ -510,13 +512,8 @@ def create_mask(
             # Get the output URL and download the mask
             output_url = status_data['output']['href']
             try:
-                # Download the file from Azure
-                mask_response = requests.get(output_url)
-                mask_response.raise_for_status()
-                
-                # Save to output file
-                with open(output_path, 'wb') as f:
-                    f.write(mask_response.content)
+                # Stream the file from Azure straight to the output file
+                download_to_file(output_url, output_path)
                 
                 if debug:
                     print(f"Mask downloaded successfully to {output_path}")
@@ -529,6 +526,6 @@ def create_mask(
             raise Exception(f"Mask creation failed: {status_data.get('error', 'Unknown error')}")
         
         # Wait before polling again
-        time.sleep(2)
+        time.sleep(next(delays))
     
     return status_data 
\ No newline at end of file
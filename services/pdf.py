@@ -1,9 +1,27 @@
 import os
 import time
 import json
-import requests
 import mimetypes
 from typing import Dict, Any, Optional
+from utils.http import SESSION, download_to_file, poll_delays, parse_json
+
+# OCR languages accepted when exporting a PDF to another format
+EXPORT_OCR_LANGUAGES = frozenset({
+    "en-GB", "en-US", "nl-NL", "fr-FR", "de-DE", "it-IT", "es-ES", "sv-SE",
+    "da-DK", "fi-FI", "nb-NO", "pt-BR", "pt-PT", "ca-CA", "nn-NO", "de-CH",
+    "ja-JP", "bg-BG", "hr-HR", "cs-CZ", "et-EE", "el-GR", "hu-HU", "lv-LV",
+    "lt-LT", "pl-PL", "ro-RO", "ru-RU", "zh-CN", "sl-SI", "zh-Hant", "tr-TR",
+    "ko-KR", "sk-SK", "eu-ES", "gl-ES", "mk-MK", "mt-MT", "sr-SR", "uk-UA", "iw-IL"
+})
+
+# OCR languages accepted by the OCR operation
+OCR_LANGUAGES = frozenset({
+    "da-DK", "lt-LT", "sl-SI", "el-GR", "ru-RU", "en-US", "zh-HK", "hu-HU", "et-EE",
+    "pt-BR", "uk-UA", "nb-NO", "pl-PL", "lv-LV", "fi-FI", "ja-JP", "es-ES", "bg-BG",
+    "en-GB", "cs-CZ", "mt-MT", "de-DE", "hr-HR", "sk-SK", "sr-SR", "ca-CA", "mk-MK",
+    "ko-KR", "de-CH", "nl-NL", "zh-CN", "sv-SE", "it-IT", "no-NO", "tr-TR", "fr-FR",
+    "ro-RO", "iw-IL"
+})
 
 def upload_file_to_pdf_services(access_token: str, file_path: str, debug: bool = False) -> str:
     """
@@ -50,7 +68,7 @@ def upload_file_to_pdf_services(access_token: str, file_path: str, debug: bool =
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
     
-    response = requests.post(
+    response = SESSION.post(
         'https://pdf-services-ue1.adobe.io/assets',
         headers=headers,
         json=payload
@@ -79,7 +97,7 @@ def upload_file_to_pdf_services(access_token: str, file_path: str, debug: bool =
         print(f"Upload headers: {upload_headers}")
     
     with open(file_path, 'rb') as f:
-        upload_response = requests.put(upload_uri, data=f, headers=upload_headers)
+        upload_response = SESSION.put(upload_uri, data=f, headers=upload_headers)
         upload_response.raise_for_status()
     
     if debug:
@@ -125,7 +143,7 @@ def convert_to_pdf(access_token: str, asset_id: str, debug: bool = False) -> Dic
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
     
-    response = requests.post(
+    response = SESSION.post(
         'https://pdf-services-ue1.adobe.io/operation/createpdf',
         headers=headers,
         json=payload
@@ -185,10 +203,11 @@ def check_pdf_job_status(status_url: str, access_token: str, debug: bool = False
         'Authorization': f'Bearer {access_token}'
     }
 
+    delays = poll_delays()
     while True:
-        response = requests.get(status_url, headers=headers)
+        response = SESSION.get(status_url, headers=headers)
         response.raise_for_status()
-        status_data = response.json()
+        status_data = parse_json(response)
         
         if debug:
             print("\nStatus Response:", status_data)
@@ -200,7 +219,7 @@ def check_pdf_job_status(status_url: str, access_token: str, debug: bool = False
         
         if debug:
             print("Waiting for job completion...")
-        time.sleep(2)  # Wait 2 seconds before checking again 
+        time.sleep(next(delays))
 
 def export_pdf(access_token: str, asset_id: str, target_format: str, ocr_lang: str = "en-US", debug: bool = False) -> Dict[str, Any]:
     """
@@ -241,7 +260,7 @@ def export_pdf(access_token: str, asset_id: str, target_format: str, ocr_lang: s
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
     
-    response = requests.post(
+    response = SESSION.post(
         'https://pdf-services-ue1.adobe.io/operation/exportpdf',
         headers=headers,
         json=payload
@@ -318,15 +337,7 @@ def validate_ocr_language(ocr_lang: str) -> bool:
     Returns:
         bool: True if valid, False otherwise
     """
-    supported_languages = [
-        "en-GB", "en-US", "nl-NL", "fr-FR", "de-DE", "it-IT", "es-ES", "sv-SE", 
-        "da-DK", "fi-FI", "nb-NO", "pt-BR", "pt-PT", "ca-CA", "nn-NO", "de-CH", 
-        "ja-JP", "bg-BG", "hr-HR", "cs-CZ", "et-EE", "el-GR", "hu-HU", "lv-LV", 
-        "lt-LT", "pl-PL", "ro-RO", "ru-RU", "zh-CN", "sl-SI", "zh-Hant", "tr-TR", 
-        "ko-KR", "sk-SK", "eu-ES", "gl-ES", "mk-MK", "mt-MT", "sr-SR", "uk-UA", "iw-IL"
-    ]
-    
-    return ocr_lang in supported_languages 
+    return ocr_lang in EXPORT_OCR_LANGUAGES
 
 def compress_pdf(access_token: str, asset_id: str, compression_level: str, debug: bool = False) -> Dict[str, Any]:
     """
@@ -372,7 +383,7 @@ def compress_pdf(access_token: str, asset_id: str, compression_level: str, debug
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
     
-    response = requests.post(
+    response = SESSION.post(
         'https://pdf-services-ue1.adobe.io/operation/compresspdf',
         headers=headers,
         json=payload
@@ -467,7 +478,7 @@ def ocr_pdf(access_token: str, asset_id: str, ocr_lang: str = "en-US", ocr_type:
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
     
-    response = requests.post(
+    response = SESSION.post(
         'https://pdf-services-ue1.adobe.io/operation/ocr',
         headers=headers,
         json=payload
@@ -516,15 +527,7 @@ def validate_ocr_language_for_ocr(ocr_lang: str) -> bool:
     Returns:
         bool: True if valid, False otherwise
     """
-    supported_languages = [
-        "da-DK", "lt-LT", "sl-SI", "el-GR", "ru-RU", "en-US", "zh-HK", "hu-HU", "et-EE", 
-        "pt-BR", "uk-UA", "nb-NO", "pl-PL", "lv-LV", "fi-FI", "ja-JP", "es-ES", "bg-BG", 
-        "en-GB", "cs-CZ", "mt-MT", "de-DE", "hr-HR", "sk-SK", "sr-SR", "ca-CA", "mk-MK", 
-        "ko-KR", "de-CH", "nl-NL", "zh-CN", "sv-SE", "it-IT", "no-NO", "tr-TR", "fr-FR", 
-        "ro-RO", "iw-IL"
-    ]
-    
-    return ocr_lang in supported_languages
+    return ocr_lang in OCR_LANGUAGES
 
 def validate_ocr_type(ocr_type: str) -> bool:
     """
@@ -574,7 +577,7 @@ def linearize_pdf(access_token: str, asset_id: str, debug: bool = False) -> Dict
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
     
-    response = requests.post(
+    response = SESSION.post(
         'https://pdf-services-ue1.adobe.io/operation/linearizepdf',
         headers=headers,
         json=payload
@@ -652,7 +655,7 @@ def autotag_pdf(access_token: str, asset_id: str, shift_headings: bool = False,
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
     
-    response = requests.post(
+    response = SESSION.post(
         'https://pdf-services-ue1.adobe.io/operation/autotag',
         headers=headers,
         json=payload
@@ -739,7 +742,7 @@ def add_watermark(access_token: str, input_asset_id: str, watermark_asset_id: st
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
     
-    response = requests.post(
+    response = SESSION.post(
         'https://pdf-services-ue1.adobe.io/operation/addwatermark',
         headers=headers,
         json=payload
@@ -792,18 +795,13 @@ def download_file(url: str, output_file: str, silent: bool = False, debug: bool
         print(f"Downloading from: {url}")
         print(f"Saving to: {output_file}")
     
-    response = requests.get(url, stream=True)
-    response.raise_for_status()
-    
     # Create output directory if it doesn't exist
     output_dir = os.path.dirname(output_file)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
     
-    with open(output_file, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            if chunk:
-                f.write(chunk)
+    # Streams in 1 MiB blocks (or parallel ranges for large files)
+    download_to_file(url, output_file)
     
     if not silent:
         print(f"Downloaded: {output_file}")
@@ -907,7 +905,7 @@ def protect_pdf(access_token: str, asset_id: str, owner_password: Optional[str]
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
     
-    response = requests.post(
+    response = SESSION.post(
         'https://pdf-services-ue1.adobe.io/operation/protectpdf',
         headers=headers,
         json=payload
@@ -976,7 +974,7 @@ def remove_password(access_token: str, asset_id: str, password: str, debug: bool
         print(f"Making request to: https://pdf-services-ue1.adobe.io/operation/removeprotection")
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
-    response = requests.post(
+    response = SESSION.post(
         'https://pdf-services-ue1.adobe.io/operation/removeprotection',
         headers=headers,
         json=payload
@@ -1057,7 +1055,7 @@ def split_pdf(access_token: str, asset_id: str, file_count: Optional[int] = None
         print(f"Headers: {headers}")
         print(f"Payload: {payload}")
     
-    response = requests.post(
+    response = SESSION.post(
         'https://pdf-services-ue1.adobe.io/operation/splitpdf',
         headers=headers,
         json=payload
@@ -1,5 +1,5 @@
 import os
-import requests
+from utils.http import SESSION
 
 def get_available_voices(access_token):
     """
@@ -17,7 +17,7 @@ def get_available_voices(access_token):
         'Authorization': f'Bearer {access_token}'
     }
 
-    response = requests.get('https://audio-video-api.adobe.io/v1/voices', headers=headers)
+    response = SESSION.get('https://audio-video-api.adobe.io/v1/voices', headers=headers)
     response.raise_for_status()
     voices_data = response.json()
     
@@ -44,7 +44,7 @@ def get_available_avatars(access_token):
         'Authorization': f'Bearer {access_token}'
     }
 
-    response = requests.get('https://audio-video-api.adobe.io/v1/avatars', headers=headers)
+    response = SESSION.get('https://audio-video-api.adobe.io/v1/avatars', headers=headers)
     response.raise_for_status()
     avatars_data = response.json()
     
@@ -157,7 +157,7 @@ def generate_speech(access_token, text, voice_id, locale_code="en-US", debug=Fal
         print("Headers:", headers)
         print("Request Body:", data)
 
-    response = requests.post(
+    response = SESSION.post(
         'https://audio-video-api.adobe.io/v1/generate-speech',
         headers=headers,
         json=data
@@ -212,7 +212,7 @@ def generate_avatar(access_token, text, voice_id, avatar_id, locale_code="en-US"
         print("Headers:", headers)
         print("Request Body:", data)
 
-    response = requests.post(
+    response = SESSION.post(
         'https://audio-video-api.adobe.io/v1/generate-avatar',
         headers=headers,
         json=data
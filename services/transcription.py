@@ -1,6 +1,6 @@
 import os
-import requests
 import json
+from utils.http import SESSION
 
 def transcribe_media(access_token, source_url, target_locale, content_type="video", text_only=False, debug=False):
     """
@@ -64,7 +64,7 @@ def transcribe_media(access_token, source_url, target_locale, content_type="vide
         print("Headers:", json.dumps(headers, indent=2))
         print("Request Body:", json.dumps(data, indent=2))
 
-    response = requests.post(
+    response = SESSION.post(
         'https://audio-video-api.adobe.io/v1/transcribe',
         headers=headers,
         json=data
@@ -1,8 +1,8 @@
-import requests
 import time
 import os
 from typing import Dict, Any, Optional
 from utils.storage import upload_to_azure_storage
+from utils.http import SESSION, download_to_file, parse_json
 
 # Video generation API URL
 VIDEO_GENERATION_API_URL = "https://firefly-api.adobe.io/v3/videos/generate"
@@ -167,7 +167,7 @@ def generate_video(
         print(f"  Payload: {payload}")
     
     # Make API request
-    response = requests.post(VIDEO_GENERATION_API_URL, headers=headers, json=payload)
+    response = SESSION.post(VIDEO_GENERATION_API_URL, headers=headers, json=payload)
     
     if debug:
         print(f"DEBUG: Response status: {response.status_code}")
@@ -201,14 +201,14 @@ def check_video_job_status(status_url: str, access_token: str, debug: bool = Fal
     if debug:
         print(f"DEBUG: Checking video job status: {status_url}")
     
-    response = requests.get(status_url, headers=headers)
+    response = SESSION.get(status_url, headers=headers)
     
     if debug:
         print(f"DEBUG: Status response: {response.status_code}")
         print(f"DEBUG: Status body: {response.text}")
     
     response.raise_for_status()
-    return response.json()
+    return parse_json(response)
 
 def download_video(url: str, output_file: str, debug: bool = False) -> None:
     """
@@ -230,12 +230,7 @@ def download_video(url: str, output_file: str, debug: bool = False) -> None:
     os.makedirs(os.path.dirname(output_file) if os.path.dirname(output_file) else '.', exist_ok=True)
     
     # Download the video
-    response = requests.get(url, stream=True)
-    response.raise_for_status()
-    
-    with open(output_file, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+    download_to_file(url, output_file)
     
     if debug:
         print(f"DEBUG: Video downloaded successfully to: {output_file}") 
\ No newline at end of file
@@ -1,7 +1,17 @@
 import os
 import sys
+import json
+import time
+import tempfile
 import requests
+from threading import Lock
 from dotenv import load_dotenv
+from utils.http import SESSION
+from utils.cache import CACHE_DIR
+
+# Where the access token is kept between runs so back-to-back invocations
+# skip the IMS round trip; set FFCLI_TOKEN_CACHE=0 to disable
+TOKEN_FILE = os.path.join(CACHE_DIR, 'token.json')
 
 def retrieve_access_token(silent=False, debug=False):
     """
@@ -15,6 +25,18 @@ def retrieve_access_token(silent=False, debug=False):
     Returns:
         str: The access token for API authentication
     """
+    return _request_token(debug)['access_token']
+
+def _request_token(debug=False):
+    """
+    Request a new token from Adobe IMS.
+    
+    Args:
+        debug (bool): Whether to show debug information
+    
+    Returns:
+        dict: The token response, including 'access_token' and 'expires_in' (seconds)
+    """
     load_dotenv()  # Load environment variables from .env file
     
     if 'FIREFLY_SERVICES_CLIENT_ID' not in os.environ or 'FIREFLY_SERVICES_CLIENT_SECRET' not in os.environ:
@@ -35,9 +57,156 @@ def retrieve_access_token(silent=False, debug=False):
         'scope': scope
     }
 
-    response = requests.post(token_url, data=payload)
+    response = SESSION.post(token_url, data=payload)
     response.raise_for_status()
     token_data = response.json()
     if debug:
         print("Access Token Retrieved")
-    return token_data['access_token'] 
\ No newline at end of file
+    return token_data
+
+def _token_file_enabled():
+    return os.getenv('FFCLI_TOKEN_CACHE', '1').lower() not in ('0', 'false', 'no')
+
+def _token_owner():
+    # Saved tokens are only reused for the same credentials and scope
+    return f"{os.getenv('FIREFLY_SERVICES_CLIENT_ID', '')}|{os.getenv('FIREFLY_SERVICES_SCOPE', '')}"
+
+def _load_saved_token(refresh_margin, debug=False):
+    """
+    Read the token saved by an earlier run, if it is still valid.
+    
+    Args:
+        refresh_margin (int): Seconds before expiry at which a token counts as expired
+        debug (bool): Whether to show debug information
+    
+    Returns:
+        tuple: (access_token, expires_at), or None if there is no usable token
+    """
+    if not _token_file_enabled():
+        return None
+    try:
+        with open(TOKEN_FILE, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved['owner'] != _token_owner() or time.time() >= saved['expires_at'] - refresh_margin:
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if debug:
+        print("Using saved access token")
+    return saved['access_token'], saved['expires_at']
+
+def _save_token(access_token, expires_at, debug=False):
+    """
+    Save a token for later runs. On POSIX systems the file is readable only
+    by the current user; on Windows it inherits the directory's permissions.
+    Failures are reported in debug mode but never raised.
+    
+    Args:
+        access_token (str): The access token
+        expires_at (float): Expiry as a Unix timestamp
+        debug (bool): Whether to show debug information
+    """
+    if not _token_file_enabled():
+        return
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        # mkstemp creates the file with mode 0600; replace it in one step so
+        # a concurrent run never reads a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'owner': _token_owner(), 'access_token': access_token, 'expires_at': expires_at}, f)
+            os.replace(tmp_path, TOKEN_FILE)
+        except BaseException:
+            # Don't leave a stray copy of the token behind
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    except OSError as e:
+        if debug:
+            print(f"Could not save access token: {str(e)}")
+
+class TokenCache:
+    """
+    Thread-safe holder for an access token that is refreshed shortly before
+    it expires, or on demand after the API rejects it, so long-running
+    batches don't fail once the original token runs out.
+    """
+
+    def __init__(self, access_token=None, refresh_margin=60, debug=False):
+        """
+        Args:
+            access_token (str): An already retrieved token to start with. Its
+                expiry is unknown, so it is used until the API rejects it.
+            refresh_margin (int): Seconds before expiry at which to refresh
+            debug (bool): Whether to show debug information
+        """
+        self.token = access_token
+        self.expires_at = None
+        self.refresh_margin = refresh_margin
+        self.debug = debug
+        self.lock = Lock()
+
+    def get_token(self):
+        """
+        Get a valid access token, fetching a new one if it is about to expire.
+        
+        Returns:
+            str: The access token
+        """
+        with self.lock:
+            if self.token is None:
+                saved = _load_saved_token(self.refresh_margin, self.debug)
+                if saved:
+                    self.token, self.expires_at = saved
+            if self.token is None or (self.expires_at is not None and time.time() >= self.expires_at - self.refresh_margin):
+                self._refresh()
+            return self.token
+
+    def refresh(self, stale_token):
+        """
+        Replace a token the API has rejected. If another thread has already
+        replaced it, the newer token is returned without another request.
+        
+        Args:
+            stale_token (str): The token that was rejected
+        
+        Returns:
+            str: A fresh access token
+        """
+        with self.lock:
+            if self.token == stale_token:
+                self._refresh()
+            return self.token
+
+    def call(self, func):
+        """
+        Call func with the current token. If the API rejects the token with
+        a 401, refresh it and call func once more.
+        
+        Args:
+            func (callable): Takes an access token and makes the request
+        
+        Returns:
+            Any: Whatever func returns
+        """
+        token = self.get_token()
+        try:
+            return func(token)
+        except requests.exceptions.HTTPError as e:
+            if e.response is None or e.response.status_code != 401:
+                raise
+            if self.debug:
+                print("Access token rejected. Refreshing and retrying...")
+            return func(self.refresh(token))
+
+    def _refresh(self):
+        token_data = _request_token(self.debug)
+        self.token = token_data['access_token']
+        expires_in = token_data.get('expires_in')
+        self.expires_at = time.time() + float(expires_in) if expires_in else None
+        if self.expires_at is not None:
+            # Also overwrites a saved token the API has just rejected
+            _save_token(self.token, self.expires_at, self.debug)
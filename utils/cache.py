@@ -0,0 +1,111 @@
+import os
+import mmap
+import shutil
+import hashlib
+import tempfile
+
+# Directory for cached generation results, overridable via FFCLI_CACHE_DIR
+CACHE_DIR = os.path.expanduser(os.getenv('FFCLI_CACHE_DIR', '~/.ffcli_cache'))
+
+
+def cache_enabled(no_cache=False):
+    """
+    Check whether the result cache should be used.
+
+    Args:
+        no_cache (bool): Value of the command's --no-cache flag
+
+    Returns:
+        bool: False if disabled by the flag or by FFCLI_CACHE=0, True otherwise
+    """
+    if no_cache:
+        return False
+    return os.getenv('FFCLI_CACHE', '1').lower() not in ('0', 'false', 'no')
+
+
+def cache_key(input_path, *parts):
+    """
+    Build a content-addressed cache key for an operation on an input file.
+
+    Args:
+        input_path (str): Path to the input file; its bytes are part of the key
+        *parts (str): Additional values that affect the result (prompt, operation name, ...)
+
+    Returns:
+        str: Hex digest identifying the input/parameter combination
+    """
+    digest = hashlib.blake2b()
+    with open(input_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size:
+            # Hash straight from the page cache rather than copying the file into
+            # Python bytes objects first
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+    for part in parts:
+        # Length-prefix each part so ('ab', 'c') and ('a', 'bc') don't collide
+        encoded = str(part).encode('utf-8')
+        digest.update(len(encoded).to_bytes(8, 'little'))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def _cache_path(key, extension):
+    return os.path.join(CACHE_DIR, f"{key}{extension}")
+
+
+def fetch_cached(key, output_path, debug=False):
+    """
+    Copy a cached result to output_path if one exists.
+
+    Args:
+        key (str): Cache key from cache_key()
+        output_path (str): Where the cached result should be written
+        debug (bool): Whether to show debug information
+
+    Returns:
+        bool: True if a cached result was copied, False on a cache miss
+    """
+    cached = _cache_path(key, os.path.splitext(output_path)[1])
+    if not os.path.isfile(cached):
+        return False
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    shutil.copyfile(cached, output_path)
+    if debug:
+        print(f"Cache hit: copied {cached} to {output_path}")
+    return True
+
+
+def store_cached(key, result_path, debug=False):
+    """
+    Save a generated result in the cache. Failures are reported in debug mode
+    but never raised, since caching is only an optimization.
+
+    Args:
+        key (str): Cache key from cache_key()
+        result_path (str): Path of the generated file to cache
+        debug (bool): Whether to show debug information
+    """
+    cached = _cache_path(key, os.path.splitext(result_path)[1])
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Copy to a temporary name first so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(result_path, tmp_path)
+            os.replace(tmp_path, cached)
+        except OSError:
+            # Don't leave the partial copy behind
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        if debug:
+            print(f"Cached result at {cached}")
+    except OSError as e:
+        if debug:
+            print(f"Could not cache result: {str(e)}")
@@ -1,8 +1,12 @@
 import os
 import re
+import functools
 from datetime import datetime, UTC
 from itertools import product
 
+# A [option1,option2,...] variation block in a prompt
+_VARIATION_BLOCK = re.compile(r'\[(.*?)\]')
+
 def get_size_mapping(model_version):
     """
     Get the size mapping for the specified model version.
@@ -94,7 +98,7 @@ def parse_size(size_str, model_version, debug=False):
     except ValueError:
         raise ValueError(f"Invalid size format: {size_str}. Use WxH format (e.g., 1024x1024) or a named size.")
 
-def get_unique_filename(base_filename, overwrite=False, debug=False):
+def get_unique_filename(base_filename, overwrite=False, debug=False, reserved=()):
     """
     Generate a unique filename, either by overwriting or adding a number suffix.
     Creates any necessary directories in the path.
@@ -103,6 +107,8 @@ def get_unique_filename(base_filename, overwrite=False, debug=False):
         base_filename (str): The original filename
         overwrite (bool): Whether to overwrite existing files
         debug (bool): Whether to show debug information
+        reserved (Collection[str]): Filenames already claimed by outputs that
+            have not been written yet; these are never returned
     
     Returns:
         str: The unique filename
@@ -120,17 +126,17 @@ def get_unique_filename(base_filename, overwrite=False, debug=False):
             print(f"Error creating directory {directory}: {str(e)}")
             raise
     
-    if overwrite or not os.path.exists(base_filename):
+    if base_filename not in reserved and (overwrite or not os.path.exists(base_filename)):
         return base_filename
     
     # Split the filename into name and extension
     name, ext = os.path.splitext(base_filename)
     counter = 1
     
-    # Keep trying new filenames until we find one that doesn't exist
+    # Keep trying new filenames until we find one that is free
     while True:
         new_filename = f"{name}_{counter}{ext}"
-        if not os.path.exists(new_filename):
+        if new_filename not in reserved and (overwrite or not os.path.exists(new_filename)):
             return new_filename
         counter += 1
 
@@ -145,27 +151,59 @@ def parse_prompt_variations(prompt):
         tuple: (list of prompts, list of variation blocks)
     """
     # Find all variation blocks in the prompt
-    variation_blocks = re.findall(r'\[(.*?)\]', prompt)
+    variation_blocks = _VARIATION_BLOCK.findall(prompt)
     if not variation_blocks:
         return [prompt], []
     
     # Split each block into options
-    options = [block.split(',') for block in variation_blocks]
-    
-    # Generate all possible combinations
-    combinations = list(product(*options))
+    options = [[option.strip() for option in block.split(',')] for block in variation_blocks]
     
-    # Generate all possible prompts
+    # Splitting on the blocks leaves the literal text around them (the
+    # captured block contents sit at the odd indices), so each prompt is one
+    # join instead of a regex substitution per block
+    parts = _VARIATION_BLOCK.split(prompt)
     prompts = []
-    for combo in combinations:
-        current_prompt = prompt
-        for i, value in enumerate(combo):
-            # Replace the first occurrence of [options] with the current value
-            current_prompt = re.sub(r'\[.*?\]', value.strip(), current_prompt, count=1)
-        prompts.append(current_prompt)
+    for combo in product(*options):
+        parts[1::2] = combo
+        prompts.append(''.join(parts))
     
     return prompts, variation_blocks
 
+# Filename tokens and how to compute each from the token values; built once
+# rather than on every call
+_TOKEN_PATTERNS = {
+    'prompt': lambda t: t.get('prompt', '').replace(' ', '_')[:30],  # Limit prompt length
+    'date': lambda t: datetime.now(UTC).strftime('%Y%m%d'),
+    'time': lambda t: datetime.now(UTC).strftime('%H%M%S'),
+    'datetime': lambda t: datetime.now(UTC).strftime('%Y%m%d_%H%M%S'),
+    'seed': lambda t: '_'.join(map(str, t.get('seeds', []))) if t.get('seeds') else '',
+    'sr': lambda t: os.path.splitext(os.path.basename(t.get('style_ref', '')))[0] if t.get('style_ref') else '',
+    'model': lambda t: t.get('model', ''),
+    'width': lambda t: str(t.get('size', {}).get('width', '')),
+    'height': lambda t: str(t.get('size', {}).get('height', '')),
+    'dimensions': lambda t: f"{t.get('size', {}).get('width', '')}x{t.get('size', {}).get('height', '')}" if t.get('size') else '',
+    'n': lambda t: str(t.get('iteration', '')),  # Add iteration number token
+}
+
+# A {token} in a filename template
+_FILENAME_TOKEN = re.compile(r'\{(\w+)\}')
+# A {var1}, {var2}, ... variation token name
+_VARIATION_TOKEN = re.compile(r'var([1-9]\d*)')
+
+@functools.lru_cache(maxsize=32)
+def _parse_filename_template(filename):
+    """
+    Split a filename template into literal text and token names. A batch
+    formats the same template for every output, so this runs once per template.
+    
+    Args:
+        filename (str): The filename containing tokens
+    
+    Returns:
+        tuple: Literal text at even indices, token names at odd indices
+    """
+    return tuple(_FILENAME_TOKEN.split(filename))
+
 def replace_filename_tokens(filename, tokens, debug=False):
     """
     Replace tokens in the filename with their corresponding values.
@@ -182,33 +220,23 @@ def replace_filename_tokens(filename, tokens, debug=False):
         print(f"Replacing tokens in filename: {filename}")
         print(f"Available tokens: {tokens}")
     
-    # Define token patterns and their replacements
-    token_patterns = {
-        '{prompt}': lambda t: t.get('prompt', '').replace(' ', '_')[:30],  # Limit prompt length
-        '{date}': lambda t: datetime.now(UTC).strftime('%Y%m%d'),
-        '{time}': lambda t: datetime.now(UTC).strftime('%H%M%S'),
-        '{datetime}': lambda t: datetime.now(UTC).strftime('%Y%m%d_%H%M%S'),
-        '{seed}': lambda t: '_'.join(map(str, t.get('seeds', []))) if t.get('seeds') else '',
-        '{sr}': lambda t: os.path.splitext(os.path.basename(t.get('style_ref', '')))[0] if t.get('style_ref') else '',
-        '{model}': lambda t: t.get('model', ''),
-        '{width}': lambda t: str(t.get('size', {}).get('width', '')),
-        '{height}': lambda t: str(t.get('size', {}).get('height', '')),
-        '{dimensions}': lambda t: f"{t.get('size', {}).get('width', '')}x{t.get('size', {}).get('height', '')}" if t.get('size') else '',
-        '{n}': lambda t: str(t.get('iteration', '')),  # Add iteration number token
-    }
-    
-    # Add variation tokens
-    for i, var in enumerate(tokens.get('variations', []), 1):
-        token_patterns[f'{{var{i}}}'] = lambda t, v=var: v.replace(' ', '_')
-    
-    # Replace all tokens in the filename
-    result = filename
-    for pattern, replacement_func in token_patterns.items():
-        if pattern in result:
-            replacement = replacement_func(tokens)
-            if debug:
-                print(f"Replacing {pattern} with {replacement}")
-            result = result.replace(pattern, replacement)
+    parts = list(_parse_filename_template(filename))
+    variations = tokens.get('variations', [])
+    for i in range(1, len(parts), 2):
+        name = parts[i]
+        if name in _TOKEN_PATTERNS:
+            replacement = _TOKEN_PATTERNS[name](tokens)
+        else:
+            var = _VARIATION_TOKEN.fullmatch(name)
+            if not var or int(var.group(1)) > len(variations):
+                # Not a known token; leave it in place
+                parts[i] = f'{{{name}}}'
+                continue
+            replacement = variations[int(var.group(1)) - 1].replace(' ', '_')
+        if debug:
+            print(f"Replacing {{{name}}} with {replacement}")
+        parts[i] = replacement
+    result = ''.join(parts)
     
     if debug:
         print(f"Final filename: {result}")
@@ -231,7 +259,7 @@ def get_variation_filename(base_filename, prompt, original_prompt, tokens=None,
     name, ext = os.path.splitext(base_filename)
     
     # Find all variation blocks in the original prompt
-    variation_blocks = re.findall(r'\[(.*?)\]', original_prompt)
+    variation_blocks = _VARIATION_BLOCK.findall(original_prompt)
     
     # Extract the values used in this prompt
     variation_values = []
@@ -0,0 +1,311 @@
+import os
+import json
+import random
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def _create_session():
+    """
+    Create the shared HTTP session.
+
+    Connections are pooled and kept alive, so repeated calls to the same host
+    (status polling in particular) skip the TCP and TLS handshakes. Idempotent
+    requests are retried on connection errors and on 429/5xx responses,
+    honoring Retry-After. POSTs are never retried automatically.
+
+    Auth headers are deliberately not set on the session: downloads go to
+    presigned storage URLs that must not receive the Firefly token, and the
+    token can be refreshed mid-run.
+
+    Returns:
+        requests.Session: The configured session
+    """
+    # Size the per-host pool to the most threads that can talk to one host at
+    # once (rate-limited submit workers plus their poll workers), so no
+    # connection is discarded after use. Read .env first since this runs at import.
+    load_dotenv()
+    throttle_limit = int(os.getenv('THROTTLE_LIMIT_FIREFLY', 5))
+    session = requests.Session()
+    _mount_adapter(session, max(32, throttle_limit * 5))
+    return session
+
+
+# Per-host pool size of the adapter currently mounted on the shared session
+_pool_size = 0
+
+
+def _mount_adapter(session, pool_size):
+    """
+    Mount a retrying, pooled adapter for http and https on session.
+
+    Args:
+        session (requests.Session): The session to configure
+        pool_size (int): Most connections kept open per host
+    """
+    global _pool_size
+    retry = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        # Hand the final error response back so callers' raise_for_status()
+        # and HTTPError handling keep working
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    _pool_size = pool_size
+
+
+# Shared across threads; requests sessions are safe for concurrent simple use
+SESSION = _create_session()
+
+
+def ensure_pool_size(max_threads):
+    """
+    Grow the shared session's per-host pool to fit max_threads concurrent
+    requests, for commands whose worker count is set on the command line
+    rather than by THROTTLE_LIMIT_FIREFLY. Growing the pool replaces the
+    adapter and drops its open connections, so call this before any request.
+
+    Args:
+        max_threads (int): Most threads that may use one host at once
+    """
+    if max_threads > _pool_size:
+        _mount_adapter(SESSION, max_threads)
+
+
+def prewarm(url):
+    """
+    Open a pooled connection to url's host in a background thread, so the
+    TCP and TLS handshakes overlap other startup work instead of delaying the
+    first real request. Errors are ignored; the first real request simply
+    connects itself.
+
+    Args:
+        url (str): Any URL on the host to connect to
+    """
+    def warm():
+        try:
+            SESSION.head(url, timeout=5)
+        except requests.exceptions.RequestException:
+            pass
+    threading.Thread(target=warm, daemon=True).start()
+
+
+def poll_delays(min_interval=0.25, max_interval=5.0):
+    """
+    Yield the waits between status polls: short at first so quick jobs return
+    promptly, then doubling up to max_interval. Each wait gets up to 10% jitter
+    so parallel pollers don't hit the server in lockstep.
+
+    Args:
+        min_interval (float): First wait in seconds
+        max_interval (float): Longest wait in seconds
+
+    Yields:
+        float: Seconds to wait before the next poll
+    """
+    delay = min_interval
+    while True:
+        yield delay + random.uniform(0, delay * 0.1)
+        delay = min(delay * 2, max_interval)
+
+
+def parse_json(response):
+    """
+    Decode a JSON response body, using orjson when it is installed.
+
+    Args:
+        response (requests.Response): The HTTP response
+
+    Returns:
+        Any: The decoded JSON payload
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
+
+def is_read_timeout(error):
+    """
+    Check whether a request failed because the server did not respond in time.
+
+    Once the session's retries are used up, requests reports a read timeout
+    as a generic ConnectionError, so the underlying urllib3 reason is checked
+    as well.
+
+    Args:
+        error (requests.exceptions.RequestException): The raised exception
+
+    Returns:
+        bool: True if the request timed out waiting for the response
+    """
+    if isinstance(error, requests.exceptions.ReadTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, ReadTimeoutError)
+
+
+def iter_json_array(response):
+    """
+    Iterate over the items of a JSON array response body.
+
+    With ijson installed the body is parsed incrementally as it arrives, so
+    only one item is held in memory at a time; the response should be opened
+    with stream=True for that to help. Otherwise the whole body is decoded
+    with parse_json.
+
+    Args:
+        response (requests.Response): The HTTP response
+
+    Returns:
+        Iterator: The array items, in order
+    """
+    if ijson is None:
+        return iter(parse_json(response))
+    # Let urllib3 undo any gzip/deflate transfer encoding before ijson reads
+    response.raw.decode_content = True
+    return ijson.items(response.raw, 'item', use_float=True)
+
+
+def preallocate(f, response):
+    """
+    Reserve disk space for a download up front from its Content-Length, so the
+    file is allocated in one go rather than extended chunk by chunk. Does
+    nothing where posix_fallocate is unavailable (e.g. Windows, macOS), when
+    the length is unknown, or when the body is content-encoded (the decoded
+    size differs from Content-Length).
+
+    Args:
+        f (file): File object opened for binary writing
+        response (requests.Response): The streaming HTTP response
+    """
+    if not hasattr(os, 'posix_fallocate') or response.headers.get('Content-Encoding'):
+        return
+    try:
+        size = int(response.headers.get('Content-Length', 0))
+    except ValueError:
+        return
+    if size > 0:
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+        except OSError:
+            # Unsupported filesystem; fall back to growing the file as it is written
+            pass
+
+
+# Downloads at least this large are fetched as parallel byte ranges
+RANGE_DOWNLOAD_MIN_BYTES = 16 * 1024 * 1024
+RANGE_DOWNLOAD_PARTS = 4
+# Outputs are images, audio and video that are already compressed, so ask for
+# them as-is; this also keeps Content-Length equal to the bytes written, which
+# preallocation and ranged downloads rely on
+DOWNLOAD_HEADERS = {'Accept-Encoding': 'identity'}
+
+
+def _supports_parallel_ranges(response):
+    if not hasattr(os, 'pwrite') or response.headers.get('Content-Encoding'):
+        return False
+    if response.headers.get('Accept-Ranges', '').lower() != 'bytes':
+        return False
+    try:
+        return int(response.headers.get('Content-Length', 0)) >= RANGE_DOWNLOAD_MIN_BYTES
+    except ValueError:
+        return False
+
+
+def _download_ranges(url, output_file, size, parts=RANGE_DOWNLOAD_PARTS):
+    """
+    Download a file as parallel byte ranges, each written into its own region
+    of the output file.
+
+    Raises:
+        requests.RequestException: If a range request fails
+        ValueError: If the server does not honor a range request
+    """
+    part_size = -(-size // parts)
+    ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+    def fetch(start, end):
+        with SESSION.get(url, headers={**DOWNLOAD_HEADERS, 'Range': f'bytes={start}-{end}'}, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise ValueError("Server ignored the range request")
+            offset = start
+            while True:
+                block = response.raw.read(1024 * 1024)
+                if not block:
+                    break
+                os.pwrite(fd, block, offset)
+                offset += len(block)
+            if offset != end + 1:
+                raise ValueError(f"Incomplete range {start}-{end}")
+
+    fd = os.open(output_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        if hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except OSError:
+                os.ftruncate(fd, size)
+        else:
+            os.ftruncate(fd, size)
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            for future in [executor.submit(fetch, start, end) for start, end in ranges]:
+                future.result()
+    finally:
+        os.close(fd)
+
+
+def download_to_file(url, output_file):
+    """
+    Stream a URL to a file. Large downloads from servers that accept byte
+    ranges are split into parallel range requests; anything else, or a
+    ranged download that fails, uses a single streaming GET.
+
+    Args:
+        url (str): The URL to download
+        output_file (str): Path where the file should be saved
+
+    Raises:
+        requests.RequestException: If the download fails
+    """
+    # Probe with HEAD so a large file isn't opened as a full GET only to be
+    # abandoned. URLs presigned for GET alone may reject HEAD, which just
+    # means a single streaming GET
+    try:
+        head = SESSION.head(url, headers=DOWNLOAD_HEADERS, allow_redirects=True)
+    except requests.RequestException:
+        head = None
+    if head is not None and head.ok and _supports_parallel_ranges(head):
+        try:
+            _download_ranges(url, output_file, int(head.headers['Content-Length']))
+            return
+        except (requests.RequestException, ValueError, OSError):
+            pass
+
+    with SESSION.get(url, headers=DOWNLOAD_HEADERS, stream=True) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        with open(output_file, 'wb') as f:
+            preallocate(f, response)
+            shutil.copyfileobj(response.raw, f, length=1024 * 1024)
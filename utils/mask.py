@@ -0,0 +1,35 @@
+def invert_mask(input_path, output_path, debug=False):
+    """
+    Invert a mask image in-process (equivalent to ImageMagick's -negate).
+    Color channels are inverted; an alpha channel, if present, is preserved.
+
+    Args:
+        input_path (str): Path to the mask image to invert
+        output_path (str): Path where the inverted mask will be saved
+            (may be the same as input_path)
+        debug (bool): Whether to show debug information
+
+    Raises:
+        ImportError: If numpy or Pillow is not installed
+    """
+    try:
+        import numpy as np
+        from PIL import Image
+    except ImportError:
+        raise ImportError("Mask inversion requires numpy and Pillow. Install them with: pip install numpy Pillow")
+
+    with Image.open(input_path) as img:
+        if img.mode not in ('L', 'LA', 'RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+        pixels = np.asarray(img)
+
+    if pixels.ndim == 3 and pixels.shape[2] in (2, 4):
+        # Leave the alpha channel untouched
+        inverted = pixels.copy()
+        np.invert(pixels[..., :-1], out=inverted[..., :-1])
+    else:
+        inverted = np.invert(pixels)
+
+    Image.fromarray(inverted).save(output_path)
+    if debug:
+        print(f"Inverted mask saved to: {output_path}")
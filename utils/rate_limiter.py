@@ -1,4 +1,5 @@
 import time
+from collections import deque
 from threading import Lock
 
 class RateLimiter:
@@ -6,11 +7,23 @@ class RateLimiter:
         self.max_calls = max_calls
         self.period = period
         self.min_delay = min_delay
-        self.calls = []
+        # Call timestamps in the current period, oldest first
+        self.calls = deque()
         self.last_call_time = 0
         self.lock = Lock()
 
     def acquire(self):
+        self.acquire_many(1)
+
+    def acquire_many(self, n):
+        """
+        Reserve n calls in a single critical section, sleeping until the
+        whole batch fits in the current period.
+
+        Args:
+            n (int): Number of calls to reserve (capped at max_calls)
+        """
+        n = max(1, min(n, self.max_calls))
         with self.lock:
             now = time.time()
             
@@ -23,13 +36,19 @@ class RateLimiter:
                     now = time.time()
             
             # Remove calls outside the period
-            self.calls = [t for t in self.calls if now - t < self.period]
-            if len(self.calls) >= self.max_calls:
-                sleep_time = self.period - (now - self.calls[0])
+            self._expire(now)
+            if len(self.calls) + n > self.max_calls:
+                # Wait until enough of the oldest calls have expired to fit the batch
+                sleep_time = self.period - (now - self.calls[len(self.calls) + n - self.max_calls - 1])
                 if sleep_time > 0:
                     time.sleep(sleep_time)
                 now = time.time()
-                self.calls = [t for t in self.calls if now - t < self.period]
+                self._expire(now)
             
-            self.calls.append(now)
-            self.last_call_time = now 
\ No newline at end of file
+            self.calls.extend([now] * n)
+            self.last_call_time = now
+
+    def _expire(self, now):
+        # Timestamps are appended in order, so expired calls are always at the front
+        while self.calls and now - self.calls[0] >= self.period:
+            self.calls.popleft()
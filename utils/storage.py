@@ -1,11 +1,8 @@
 import os
 import mimetypes
 from datetime import datetime, timedelta, UTC
-from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
 from urllib.parse import urlparse, parse_qs
-from azure.core.exceptions import AzureError
 import time
-from tqdm import tqdm
 
 def upload_to_azure_storage(file_path, debug=False):
     """
@@ -40,6 +37,12 @@ def upload_to_azure_storage(file_path, debug=False):
     if not sas_token or not container_name or not account_name:
         raise ValueError("Azure Storage credentials not found in environment variables")
     
+    # Imported here because the Azure SDK and tqdm are slow to import and only
+    # needed for uploads
+    from azure.storage.blob import BlobServiceClient
+    from azure.core.exceptions import AzureError
+    from tqdm import tqdm
+    
     try:
         # Create the BlobServiceClient using the account URL and SAS token
         account_url = f"https://{account_name}.blob.core.windows.net"